@@ -1,24 +1,157 @@
-from flask import Flask, render_template, request, jsonify, send_file, url_for
+from flask import Flask, render_template, request, jsonify, send_file, url_for, copy_current_request_context, Response
 from datetime import datetime, timedelta
 import os
+import sys
 import json
+import itertools
+import threading
 from scraper import RatsInfoScraper
 from pdf_processor import PDFProcessor
-from export_manager import ExportManager
+from export_manager import ExportManager, STREAMING_FORMATS
+from http_cache import HTTPCache
+from pdf_store import TextCache
+from pipeline import MeetingPipeline, create_process_pool, MAX_RANKED_SENTENCES, RESULT_FIELDS
+from jobs import JobManager
+from meeting_cache import create_meeting_cache
+from meeting_store import MeetingStore, MeetingSyncer
+from prefetch import PrefetchScheduler
 
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'downloads'
 app.config['SECRET_KEY'] = 'luenen-terminplaner-2024'
+app.config['CACHE_FOLDER'] = 'cache'
+app.config['HTTP_CACHE_MAX_BYTES'] = 500 * 1024 * 1024
+# PDF pipeline: download threads and extraction/summarization processes (0 = in-thread)
+app.config['PDF_IO_WORKERS'] = 4
+# Frozen builds (PyInstaller) start no worker processes: a spawned worker
+# re-runs the executable and would start the app again if its launcher
+# lacks multiprocessing.freeze_support()
+FROZEN = getattr(sys, 'frozen', False)
+app.config['PDF_PROCESS_WORKERS'] = 0 if FROZEN else (os.cpu_count() or 1)
+# Large PDFs (e.g. council packages) are read by up to PDF_PAGE_WORKERS
+# processes. Inside the process pool they only take CPUs that no other pool
+# process is busy on: a single big package gets the idle cores, while a full
+# pool reads pages sequentially instead of oversubscribing the CPUs
+app.config['PDF_PAGE_WORKERS'] = 0 if FROZEN else 4
+app.config['PDF_PARALLEL_PAGE_THRESHOLD'] = 200
+# Processed meetings for the detail pages: 'sqlite' (persistent) or 'memory'
+app.config['MEETING_CACHE_BACKEND'] = 'sqlite'
+app.config['MEETING_CACHE_MAX_BYTES'] = 200 * 1024 * 1024
+# Local meeting store: current/future months are re-fetched after
+# SYNC_REFRESH_INTERVAL seconds, the background sync runs every SYNC_INTERVAL
+app.config['SYNC_REFRESH_INTERVAL'] = 15 * 60
+app.config['SYNC_INTERVAL'] = 60 * 60
+app.config['SYNC_LOOKBACK_MONTHS'] = 1
+app.config['SYNC_LOOKAHEAD_MONTHS'] = 3
+# /api/committees lists committees with a meeting in the last COMMITTEE_MAX_AGE_DAYS
+app.config['COMMITTEE_MAX_AGE_DAYS'] = 365
+# Background prefetch of the relevant committees' upcoming sessions while idle
+app.config['PREFETCH_ENABLED'] = True
+app.config['PREFETCH_WEEKS'] = 4
+app.config['PREFETCH_INTERVAL'] = 60 * 60
+app.config['PREFETCH_IO_WORKERS'] = 2
+app.config['PREFETCH_MAX_PENDING'] = 1
+# Scrape jobs running in the background at the same time
+app.config['SCRAPE_JOB_WORKERS'] = 2
+# Seconds between keep-alive comments on idle event streams
+app.config['EVENT_STREAM_KEEPALIVE'] = 15
+# Export files are removed after EXPORT_MAX_AGE seconds or when the folder
+# exceeds EXPORT_MAX_BYTES; the cleanup runs every EXPORT_GC_INTERVAL
+app.config['EXPORT_MAX_BYTES'] = 500 * 1024 * 1024
+app.config['EXPORT_MAX_AGE'] = 7 * 24 * 60 * 60
+app.config['EXPORT_GC_INTERVAL'] = 60 * 60
 
 if not os.path.exists(app.config['UPLOAD_FOLDER']):
     os.makedirs(app.config['UPLOAD_FOLDER'])
 
-scraper = RatsInfoScraper()
-pdf_processor = PDFProcessor()
-export_manager = ExportManager()
+# Shared on-disk HTTP cache for listings, detail pages and PDFs
+http_cache = HTTPCache(os.path.join(app.config['CACHE_FOLDER'], 'http_cache.sqlite3'),
+                       max_bytes=app.config['HTTP_CACHE_MAX_BYTES'])
 
-# Store for meeting details (in production, use a database)
-meeting_cache = {}
+scraper = RatsInfoScraper(http_cache=http_cache)
+# Extracted PDF text, keyed by document content hash
+text_cache = TextCache(os.path.join(app.config['CACHE_FOLDER'], 'text'))
+
+pdf_processor = PDFProcessor(http_cache=http_cache, text_cache=text_cache,
+                             page_workers=app.config['PDF_PAGE_WORKERS'],
+                             parallel_page_threshold=app.config['PDF_PARALLEL_PAGE_THRESHOLD'])
+export_manager = ExportManager(max_bytes=app.config['EXPORT_MAX_BYTES'],
+                               max_age=app.config['EXPORT_MAX_AGE'])
+
+# Store for meeting details, bounded and (with sqlite) kept across restarts
+meeting_cache = create_meeting_cache(app.config['MEETING_CACHE_BACKEND'],
+                                     app.config['CACHE_FOLDER'],
+                                     app.config['MEETING_CACHE_MAX_BYTES'])
+
+def fetch_listings(start_date, end_date, progress=None):
+    """All listings of a date range, without detail pages (used by the syncer).
+    
+    Raises if a month could not be fetched, so the syncer keeps what it has.
+    The syncer decides itself when a month is stale, so the HTTP cache (which
+    keeps the current month for longer than SYNC_REFRESH_INTERVAL) is bypassed.
+    """
+    return scraper.scrape_meetings(start_date, end_date, progress=progress, resolve_pdfs=False,
+                                   raise_on_error=True, cache=False)
+
+# Local copy of the upstream listings, queried by the API routes
+meeting_store = MeetingStore(os.path.join(app.config['CACHE_FOLDER'], 'meeting_store.sqlite3'))
+meeting_syncer = MeetingSyncer(meeting_store, fetch_listings,
+                               refresh_interval=app.config['SYNC_REFRESH_INTERVAL'])
+
+# Background scrape jobs (/api/jobs)
+job_manager = JobManager(max_workers=app.config['SCRAPE_JOB_WORKERS'])
+
+# Blocking /api/scrape requests in progress (prefetch only runs while idle)
+_scrape_requests = 0
+_scrape_requests_lock = threading.Lock()
+
+def is_idle():
+    return _scrape_requests == 0 and job_manager.active_count('scrape') == 0
+
+def prefetch_upcoming(job=None):
+    """Download and summarize the relevant committees' sessions of the next weeks"""
+    start_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    end_date = start_date + timedelta(weeks=app.config['PREFETCH_WEEKS'])
+    print(f"📥 Lade Sitzungen bis {end_date.strftime('%d.%m.%Y')} vorab")
+    
+    # run_scrape builds detail page URLs, which needs a request context
+    with app.test_request_context():
+        run_scrape(start_date, end_date, scraper.relevant_committees, job=job,
+                   io_workers=app.config['PREFETCH_IO_WORKERS'],
+                   max_pending=app.config['PREFETCH_MAX_PENDING'])
+
+prefetch_scheduler = PrefetchScheduler(prefetch_upcoming, interval=app.config['PREFETCH_INTERVAL'],
+                                       is_idle=is_idle)
+
+# Process pool for the PDF pipeline, started on first use
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+def get_process_pool():
+    global _process_pool
+    workers = app.config['PDF_PROCESS_WORKERS']
+    if not workers:
+        return None
+    
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = create_process_pool(
+                workers,
+                text_cache_folder=text_cache.folder,
+                page_workers=app.config['PDF_PAGE_WORKERS'],
+                parallel_page_threshold=app.config['PDF_PARALLEL_PAGE_THRESHOLD']
+            )
+        return _process_pool
+
+def replace_process_pool(broken_pool):
+    """Swap a pool whose worker died (crash, OOM kill) for a fresh one"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is broken_pool:
+            print("⚠️ PDF-Prozess abgestürzt, starte den Prozesspool neu")
+            _process_pool = None
+            broken_pool.shutdown(wait=False)
+    return get_process_pool()
 
 @app.route('/')
 def index():
@@ -31,7 +164,15 @@ def meeting_detail(meeting_id):
     if not meeting:
         return "Meeting nicht gefunden", 404
     
-    return render_template('meeting_detail.html', meeting=meeting)
+    # Other summary lengths come from the stored sentence ranking
+    sentence_count = request.args.get('saetze', type=int)
+    if sentence_count and meeting.get('ranked_sentences'):
+        sentence_count = max(1, min(sentence_count, MAX_RANKED_SENTENCES))
+        meeting = dict(meeting, detailed_summary=PDFProcessor.summary_from_ranking(
+            meeting['ranked_sentences'], sentence_count
+        ))
+    
+    return render_template('meeting_detail.html', meeting=meeting, sentence_count=sentence_count)
 
 @app.route('/api/scrape', methods=['POST'])
 def scrape_data():
@@ -40,88 +181,211 @@ def scrape_data():
     end_date = datetime.strptime(data['end_date'], '%Y-%m-%d')
     selected_committees = data.get('committees', [])
     
+    global _scrape_requests
+    with _scrape_requests_lock:
+        _scrape_requests += 1
+    
     try:
-        meetings = scraper.scrape_meetings(start_date, end_date)
-        
-        # Filter meetings by selected committees (if any specified)
-        if selected_committees:
-            filtered_meetings = []
-            for meeting in meetings:
-                if meeting.get('committee') in selected_committees:
-                    filtered_meetings.append(meeting)
-            meetings = filtered_meetings
+        processed_meetings = run_scrape(start_date, end_date, selected_committees)
+        return jsonify({'success': True, 'meetings': [public_meeting(m) for m in processed_meetings]})
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+    
+    finally:
+        with _scrape_requests_lock:
+            _scrape_requests -= 1
+
+@app.route('/api/jobs', methods=['POST'])
+def create_scrape_job():
+    """Start a scrape in the background; progress via /api/jobs/<job_id>"""
+    data = request.get_json()
+    start_date = datetime.strptime(data['start_date'], '%Y-%m-%d')
+    end_date = datetime.strptime(data['end_date'], '%Y-%m-%d')
+    selected_committees = data.get('committees', [])
+    
+    # The job builds detail page URLs, so it needs the request context
+    job = job_manager.submit('scrape', copy_current_request_context(run_scrape),
+                             start_date, end_date, selected_committees)
+    return jsonify({'success': True, 'job_id': job.id}), 202
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job nicht gefunden'}), 404
+    return jsonify({'success': True, 'job': job.to_dict()})
+
+@app.route('/api/jobs/<job_id>/events')
+def job_events(job_id):
+    """Server-Sent Events stream of a job: every meeting as soon as its listing
+    is known, again once its summary is ready, plus progress and status."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job nicht gefunden'}), 404
+    
+    # EventSource resends the last id on reconnect
+    position = request.headers.get('Last-Event-ID', 0, type=int)
+    keepalive = app.config['EVENT_STREAM_KEEPALIVE']
+    
+    def stream():
+        nonlocal position
+        while True:
+            events, finished = job.wait_events(position, timeout=keepalive)
+            for event, data in events:
+                position += 1
+                yield f"id: {position}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+            if finished and not events:
+                return
+            if not events:
+                yield ": keepalive\n\n"
+    
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    if not job_manager.cancel(job_id):
+        return jsonify({'success': False, 'error': 'Job nicht gefunden'}), 404
+    return jsonify({'success': True})
+
+def run_scrape(start_date, end_date, selected_committees, job=None, io_workers=None, max_pending=None):
+    """Scrape the meetings and process their PDFs.
+    
+    With a job, progress and partial results are published on it and the
+    run stops at the next safe point after the job is cancelled.
+    io_workers and max_pending override the configured pipeline concurrency.
+    """
+    def report_months(months_done, months_total):
+        job.check_cancelled()
+        job.update_progress(months_done=months_done, months_total=months_total)
+    
+    # Only months missing from the local store (or not final yet) are fetched
+    meeting_syncer.sync_range(start_date, end_date, progress=report_months if job else None)
+    # Committee filter is applied before any detail page is fetched
+    meetings = meeting_store.query(start_date, end_date, committees=selected_committees or None)
+    
+    processed_meetings = []
+    # PDF URL each reusable summary was made from, by meeting index
+    reusable = {}
+    
+    for i, meeting in enumerate(meetings):
+        # Same ID in every scrape, so overlapping queries reuse earlier results
+        processed_id = meeting['id']
         
-        processed_meetings = []
+        processed_meeting = {
+            'id': processed_id,
+            'title': meeting['title'],
+            'date': meeting['date'],
+            'time': meeting['time'],
+            'location': meeting['location'],
+            'committee': meeting['committee'],
+            'detail_url': meeting['detail_url'],
+            'pdf_url': meeting.get('pdf_url', ''),
+            'summary': '',
+            'detail_page_url': url_for('meeting_detail', meeting_id=processed_id)
+        }
         
-        for i, meeting in enumerate(meetings):
-            # Generate unique meeting ID (safe for URLs)
-            import re
-            safe_committee = re.sub(r'[^a-zA-Z0-9äöüÄÖÜß]', '-', meeting['committee'][:30])
-            safe_committee = re.sub(r'-+', '-', safe_committee).strip('-')
-            meeting_id = f"{meeting['date'].replace('.', '')}-{safe_committee}-{i}"
-            
-            processed_meeting = {
-                'id': meeting_id,
-                'title': meeting['title'],
-                'date': meeting['date'],
-                'time': meeting['time'],
-                'location': meeting['location'],
-                'committee': meeting['committee'],
-                'detail_url': meeting['detail_url'],
-                'pdf_url': meeting.get('pdf_url', ''),
-                'summary': '',
-                'detail_page_url': url_for('meeting_detail', meeting_id=meeting_id)
-            }
-            
-            # Process PDF for both short and detailed summary
-            full_text = ""
-            if meeting.get('pdf_url'):
-                try:
-                    pdf_path = pdf_processor.download_pdf(meeting['pdf_url'], app.config['UPLOAD_FOLDER'])
-                    full_text = pdf_processor.extract_text(pdf_path)
-                    
-                    # Short summary for overview
-                    short_summary = pdf_processor.summarize_text(full_text, sentence_count=2)
-                    processed_meeting['summary'] = short_summary
-                    
-                    # Detailed summary for detail page
-                    detailed_summary = pdf_processor.summarize_text(full_text, sentence_count=5)
-                    processed_meeting['detailed_summary'] = detailed_summary
-                    processed_meeting['full_text'] = full_text[:2000] + "..." if len(full_text) > 2000 else full_text
-                    
-                except Exception as e:
-                    processed_meeting['summary'] = f"Fehler beim Verarbeiten der PDF: {str(e)}"
-                    processed_meeting['detailed_summary'] = processed_meeting['summary']
-                    processed_meeting['full_text'] = ""
-            
-            # Store in cache for detail page
-            meeting_cache[meeting_id] = processed_meeting
-            
-            processed_meetings.append(processed_meeting)
+        previous = meeting_cache.get(processed_id)
+        # Only a non-empty sentence ranking marks a successful result; failed
+        # downloads and empty extractions are tried again
+        if previous and previous.get('ranked_sentences'):
+            processed_meeting.update((field, previous[field]) for field in RESULT_FIELDS)
+            reusable[i] = previous.get('pdf_url')
         
-        return jsonify({'success': True, 'meetings': processed_meetings})
+        processed_meetings.append(processed_meeting)
+        # Store in cache for detail page
+        meeting_cache[processed_id] = processed_meeting
     
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+    if job:
+        job.check_cancelled()
+        job.set_results(public_meeting(m) for m in processed_meetings)
+        job.update_progress(meetings_total=len(meetings))
+    
+    # Detail pages are fetched once; meetings without PDF yet are checked
+    # again until their date has passed
+    today = datetime.now().strftime('%Y-%m-%d')
+    unresolved = [
+        meeting for meeting in meetings
+        if meeting['pdf_url'] is None or (not meeting['pdf_url'] and meeting['iso_date'] >= today)
+    ]
+    if unresolved:
+        scraper.resolve_pdf_urls(unresolved)
+        meeting_store.set_pdf_urls({meeting['id']: meeting.get('pdf_url') for meeting in unresolved})
+    
+    # Meetings whose PDF still has to be processed
+    pending = []
+    for i, (meeting, processed_meeting) in enumerate(zip(meetings, processed_meetings)):
+        processed_meeting['pdf_url'] = meeting.get('pdf_url', '')
+        if i in reusable and reusable[i] != processed_meeting['pdf_url']:
+            # The PDF link changed since the summary was made
+            for field in RESULT_FIELDS:
+                processed_meeting.pop(field, None)
+            processed_meeting['summary'] = ''
+            del reusable[i]
+        if i not in reusable:
+            pending.append(i)
+        meeting_cache[processed_meeting['id']] = processed_meeting
+    
+    if job:
+        job.check_cancelled()
+        job.update_progress(
+            pdfs_total=sum(1 for i in pending if meetings[i].get('pdf_url')),
+            pdfs_done=0,
+            pdfs_reused=len(reusable)
+        )
+    
+    # Download, extract and summarize all PDFs concurrently
+    pipeline = MeetingPipeline(
+        pdf_processor,
+        app.config['UPLOAD_FOLDER'],
+        io_workers=io_workers or app.config['PDF_IO_WORKERS'],
+        process_executor=get_process_pool(),
+        max_pending=max_pending or 2 * max(1, app.config['PDF_PROCESS_WORKERS']),
+        on_broken_pool=replace_process_pool
+    )
+    results = pipeline.iter_results([meetings[i] for i in pending])
+    try:
+        for pdfs_done, (pending_index, result) in enumerate(results, 1):
+            index = pending[pending_index]
+            apply_pdf_result(processed_meetings[index], result)
+            # Cache entries are copies (sqlite), so store the updated meeting again
+            meeting_cache[processed_meetings[index]['id']] = processed_meetings[index]
+            if job:
+                job.update_result(index, public_meeting(processed_meetings[index]))
+                job.update_progress(pdfs_done=pdfs_done)
+                job.check_cancelled()
+    finally:
+        # Skips the remaining PDFs when the job was cancelled
+        results.close()
+    
+    return processed_meetings
+
+def public_meeting(processed_meeting):
+    """Meeting as sent to the browser, without server-side helper data"""
+    return {key: value for key, value in processed_meeting.items() if key != 'ranked_sentences'}
+
+def apply_pdf_result(processed_meeting, result):
+    """Copy a pipeline result (summaries or error) into a processed meeting"""
+    if 'error' in result:
+        processed_meeting['summary'] = f"Fehler beim Verarbeiten der PDF: {result['error']}"
+        processed_meeting['detailed_summary'] = processed_meeting['summary']
+        processed_meeting['full_text'] = ""
+    else:
+        processed_meeting.update(result)
 
 @app.route('/api/committees')
 def get_committees():
     """Get all available committees for filtering"""
     try:
-        # Get committees from a few recent months to find available committees
-        # This is faster than scanning the whole year
-        current_date = datetime.now()
-        start_date = datetime(current_date.year, max(1, current_date.month - 3), 1)
-        end_date = datetime(current_date.year + 1, 12, 31)
-        
-        all_meetings = scraper.scrape_meetings(start_date, end_date)
-        
-        # Extract unique committees
-        committees = set()
-        for meeting in all_meetings:
-            committee = meeting.get('committee', '').strip()
-            if committee:
-                committees.add(committee)
+        # Served from the in-memory committee index, which every sync and
+        # scrape keeps up to date; committees that stopped meeting are left out
+        cutoff = (datetime.now() - timedelta(days=app.config['COMMITTEE_MAX_AGE_DAYS'])).strftime('%Y-%m-%d')
+        index = {}
+        for name, entry in meeting_store.committee_index().items():
+            if entry['last_seen'] >= cutoff:
+                index[name.strip()] = entry
+        committees = set(index)
         
         # Always include the relevant committees from configuration
         relevant_committees = scraper.relevant_committees
@@ -134,24 +398,90 @@ def get_committees():
         return jsonify({
             'success': True, 
             'committees': sorted_committees,
-            'relevant_committees': relevant_committees
+            'relevant_committees': relevant_committees,
+            'committee_stats': {
+                name: {'count': entry['count'], 'last_seen': entry['last_seen']}
+                for name, entry in index.items()
+            }
         })
     
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-@app.route('/api/export/<format>')
-def export_data(format):
-    meetings_data = request.args.get('data')
-    if not meetings_data:
-        return jsonify({'error': 'Keine Daten zum Exportieren'}), 400
+def export_meetings():
+    """Meetings to export, referenced by job id or meeting ids instead of sent back as JSON.
+    
+    A job's results are used while the job is kept; afterwards the meeting
+    ids are looked up in the meeting cache. Full meeting lists in the POST
+    body or in ?data= are still accepted for older clients.
+    """
+    params = request.get_json(silent=True) or {}
+    
+    job_id = params.get('job_id') or request.args.get('job')
+    if job_id:
+        job = job_manager.get(job_id)
+        if job is not None:
+            return job.to_dict()['results']
+    
+    if params.get('ids'):
+        # Peek at the first meeting, so evicted ids leave nothing to export
+        meetings = cached_meetings(params['ids'])
+        first = next(meetings, None)
+        return [] if first is None else itertools.chain([first], meetings)
+    
+    if params.get('meetings'):
+        return params['meetings']
     
+    meetings_data = request.args.get('data')
+    if meetings_data:
+        return json.loads(meetings_data)
+    return None
+
+def cached_meetings(meeting_ids):
+    """Meetings from the cache, loaded one at a time while the export is written"""
+    for stored_id in meeting_ids:
+        meeting = meeting_cache.get(stored_id)
+        if meeting is None:
+            print(f"⚠️ Termin {stored_id} nicht mehr im Cache, wird nicht exportiert")
+            continue
+        yield public_meeting(meeting)
+
+@app.route('/api/export/<format>', methods=['GET', 'POST'])
+def export_data(format):
     try:
-        meetings = json.loads(meetings_data)
+        meetings = export_meetings()
+        if not meetings:
+            return jsonify({'error': 'Keine Daten zum Exportieren'}), 400
+        
+        # Text formats go straight into the response, meeting by meeting
+        if format.lower() in STREAMING_FORMATS:
+            chunks, mimetype, download_name = export_manager.stream(meetings, format)
+            return Response(chunks, mimetype=mimetype,
+                            headers={'Content-Disposition': f'attachment; filename={download_name}'})
+        
         filename = export_manager.export(meetings, format)
         return send_file(filename, as_attachment=True)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def committee_window(today=None):
+    """Months whose committees the filter list should know: three months back to the end of next year"""
+    today = today or datetime.now()
+    index = today.year * 12 + today.month - 1 - 3
+    return datetime(index // 12, index % 12 + 1, 1), datetime(today.year + 1, 12, 31)
+
+def start_background_services():
+    """Start the periodic meeting sync, prefetch and export cleanup (call once when serving the app)"""
+    # The first sync also fills the committee window, so /api/committees
+    # knows committees beyond the regular sync range without scraping
+    meeting_syncer.start(app.config['SYNC_INTERVAL'],
+                         lookback_months=app.config['SYNC_LOOKBACK_MONTHS'],
+                         lookahead_months=app.config['SYNC_LOOKAHEAD_MONTHS'],
+                         initial_range=committee_window())
+    export_manager.store.start(app.config['EXPORT_GC_INTERVAL'])
+    if app.config['PREFETCH_ENABLED']:
+        prefetch_scheduler.start()
+
 if __name__ == '__main__':
+    start_background_services()
     app.run(debug=False, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -16,6 +16,7 @@ def create_main_entry_point():
 Main entry point for Lünen Terminplaner Windows executable
 """
 
+import multiprocessing
 import os
 import sys
 import threading
@@ -27,14 +28,15 @@ from pathlib import Path
 current_dir = Path(__file__).parent
 sys.path.insert(0, str(current_dir))
 
-from app import app
-
 def open_browser():
     """Open browser after Flask starts"""
     time.sleep(2)  # Wait for Flask to start
     webbrowser.open('http://localhost:5000')
 
 def main():
+    # Imported here, so spawned PDF worker processes never load the app
+    from app import app, start_background_services
+    
     print("🚀 Lünen Terminplaner wird gestartet...")
     print("📊 Flask-Server startet auf http://localhost:5000")
     print("🌐 Browser wird automatisch geöffnet...")
@@ -42,6 +44,9 @@ def main():
     print("📝 Zum Beenden: Strg+C drücken")
     print("=" * 50)
     
+    # Keep the local meeting store up to date
+    start_background_services()
+    
     # Start browser in separate thread
     browser_thread = threading.Thread(target=open_browser)
     browser_thread.daemon = True
@@ -55,6 +60,8 @@ def main():
         sys.exit(0)
 
 if __name__ == '__main__':
+    # Spawned PDF worker processes must not start the app again
+    multiprocessing.freeze_support()
     main()
 '''
     
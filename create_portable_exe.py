@@ -286,7 +286,9 @@ def create_portable_package():
     # Check required files
     required_files = [
         'main_standalone.py', 'app.py', 'scraper.py', 
-        'pdf_processor.py', 'export_manager.py',
+        'pdf_processor.py', 'export_manager.py', 'export_store.py',
+        'http_cache.py', 'pdf_store.py', 'pipeline.py', 'jobs.py',
+        'meeting_cache.py', 'meeting_store.py', 'prefetch.py',
         'requirements_minimal.txt', 'spezifikation.md'
     ]
     
@@ -310,7 +312,9 @@ def create_portable_package():
     # Files to include
     files_to_copy = [
         'main_standalone.py', 'app.py', 'scraper.py', 
-        'pdf_processor.py', 'export_manager.py',
+        'pdf_processor.py', 'export_manager.py', 'export_store.py',
+        'http_cache.py', 'pdf_store.py', 'pipeline.py', 'jobs.py',
+        'meeting_cache.py', 'meeting_store.py', 'prefetch.py',
         'requirements_minimal.txt', 'spezifikation.md',
         'LuenenTerminplaner.bat', 'LuenenTerminplaner.sh',
         'install.bat', 'README.md'
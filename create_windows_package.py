@@ -340,6 +340,14 @@ def create_distribution_package():
         'scraper.py', 
         'pdf_processor.py',
         'export_manager.py',
+        'export_store.py',
+        'http_cache.py',
+        'pdf_store.py',
+        'pipeline.py',
+        'jobs.py',
+        'meeting_cache.py',
+        'meeting_store.py',
+        'prefetch.py',
         'requirements.txt',
         'spezifikation.md',
         'main.py',
@@ -1,8 +1,16 @@
+import hashlib
+import itertools
 import json
 import os
+import textwrap
+import threading
 from datetime import datetime
 from pathlib import Path
 
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from export_store import ExportStore
+
 try:
     import markdown
     MARKDOWN_AVAILABLE = True
@@ -17,11 +25,54 @@ except (ImportError, OSError) as e:
     WEASYPRINT_AVAILABLE = False
     print(f"Warning: WeasyPrint not available ({e}). PDF export will be limited.")
 
+EXPORT_TEMPLATE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'export')
+
+# One environment per process: every template is compiled on first use and
+# then served from the cache (auto_reload=False skips the file checks).
+# HTML is autoescaped, Markdown is written as is.
+_template_env = Environment(
+    loader=FileSystemLoader(EXPORT_TEMPLATE_FOLDER),
+    autoescape=select_autoescape(['html']),
+    auto_reload=False,
+    trim_blocks=True,
+    lstrip_blocks=True,
+    keep_trailing_newline=True
+)
+
+def get_export_template(name):
+    return _template_env.get_template(name)
+
+# Formats written meeting by meeting, so they can be streamed to the client
+STREAMING_FORMATS = {
+    'markdown': ('text/markdown', 'md'),
+    'html': ('text/html', 'html'),
+    'json': ('application/json', 'json')
+}
+
+# Part of the stored export names; increase when templates or styles change
+EXPORT_CACHE_VERSION = 1
+
 class ExportManager:
-    def __init__(self):
-        self.export_folder = "exports"
-        if not os.path.exists(self.export_folder):
-            os.makedirs(self.export_folder)
+    def __init__(self, pdf_chunk_threshold=200, max_bytes=500 * 1024 * 1024, max_age=7 * 24 * 3600):
+        # Export files with unique names and bounded retention
+        self.store = ExportStore("exports", max_bytes=max_bytes, max_age=max_age)
+        
+        # Larger PDF exports are laid out month by month and merged
+        self.pdf_chunk_threshold = pdf_chunk_threshold
+        # Parsed once and reused for every PDF
+        self._pdf_css = CSS(string=get_export_template('export_pdf.css').render()) if WEASYPRINT_AVAILABLE else None
+        # PDFs being rendered, by file name; other requests for the same
+        # export wait for it, different exports render concurrently
+        self._pdf_lock = threading.Lock()
+        self._pdf_renders = {}
+    
+    @property
+    def export_folder(self):
+        return self.store.folder
+    
+    @export_folder.setter
+    def export_folder(self, folder):
+        self.store = ExportStore(folder, max_bytes=self.store.max_bytes, max_age=self.store.max_age)
     
     def export(self, meetings, format_type):
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -37,201 +88,131 @@ class ExportManager:
         else:
             raise ValueError(f"Unbekanntes Export-Format: {format_type}")
     
-    def _export_markdown(self, meetings, timestamp):
-        filename = os.path.join(self.export_folder, f"ratsinfo_export_{timestamp}.md")
+    def stream(self, meetings, format_type):
+        """Export as (chunks, mimetype, download_name) without building the document in memory.
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write("# Ratsinfo Lünen - Terminübersicht\n\n")
-            f.write(f"Erstellt am: {datetime.now().strftime('%d.%m.%Y %H:%M')}\n\n")
-            f.write("---\n\n")
-            
-            for meeting in meetings:
-                f.write(f"## {meeting['title']}\n\n")
-                f.write(f"**Datum:** {meeting['date']}\n")
-                f.write(f"**Uhrzeit:** {meeting['time']}\n")
-                f.write(f"**Ort:** {meeting['location']}\n")
-                f.write(f"**Gremium:** {meeting['committee']}\n\n")
-                
-                if meeting.get('summary'):
-                    f.write("### Zusammenfassung\n\n")
-                    f.write(f"{meeting['summary']}\n\n")
-                
-                if meeting.get('pdf_url'):
-                    f.write(f"**PDF-Dokument:** [Link zum Dokument]({meeting['pdf_url']})\n\n")
-                
-                f.write("---\n\n")
+        meetings may be any iterable; it is consumed one meeting at a time
+        while the chunks are generated.
+        """
+        format_type = format_type.lower()
+        if format_type not in STREAMING_FORMATS:
+            raise ValueError(f"Export-Format kann nicht gestreamt werden: {format_type}")
         
-        return filename
+        mimetype, extension = STREAMING_FORMATS[format_type]
+        chunks = getattr(self, f'iter_{format_type}')(meetings)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return chunks, mimetype, f"ratsinfo_export_{timestamp}.{extension}"
     
-    def _export_html(self, meetings, timestamp):
-        filename = os.path.join(self.export_folder, f"ratsinfo_export_{timestamp}.html")
+    def iter_markdown(self, meetings):
+        return self._generate('export.md', meetings)
+    
+    def iter_json(self, meetings):
+        yield '{\n'
+        yield f'  "export_date": {json.dumps(datetime.now().isoformat())},\n'
+        yield '  "meetings": ['
         
-        html_content = self._generate_html_content(meetings)
+        separator = '\n'
+        for meeting in meetings:
+            yield separator + textwrap.indent(json.dumps(meeting, ensure_ascii=False, indent=2), '    ')
+            separator = ',\n'
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        yield '\n  ]\n}' if separator != '\n' else ']\n}'
+    
+    def _export_markdown(self, meetings, timestamp):
+        return self._save_export(meetings, 'md', self.iter_markdown)
+    
+    def _export_html(self, meetings, timestamp):
+        return self._save_export(meetings, 'html', self.iter_html)
+    
+    def _save_export(self, meetings, extension, render):
+        """Store an export named after its meetings; the same meetings reuse the stored file.
         
-        return filename
+        The file keeps the creation date of its first export, which is why the
+        name is not taken from the content (it contains that date).
+        """
+        meetings = list(meetings)
+        name = self._export_name(meetings, extension)
+        filename = self.store.get(name)
+        if filename:
+            print(f"📄 Export aus dem Cache: {filename}")
+            return filename
+        return self.store.save(render(meetings), extension, name=name)
+    
+    def _export_name(self, meetings, extension):
+        return f"{ExportStore.PREFIX}{self._meetings_hash(meetings)[:16]}.{extension}"
     
     def _export_pdf(self, meetings, timestamp):
-        filename = os.path.join(self.export_folder, f"ratsinfo_export_{timestamp}.pdf")
-        
         if not WEASYPRINT_AVAILABLE:
             # Fallback: create HTML file instead
-            html_filename = os.path.join(self.export_folder, f"ratsinfo_export_{timestamp}_fallback.html")
-            html_content = self._generate_html_content(meetings)
-            with open(html_filename, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-            return html_filename
-        
-        html_content = self._generate_html_content(meetings)
-        
-        css = CSS(string='''
-            @page {
-                margin: 2cm;
-                @top-center {
-                    content: "Ratsinfo Lünen - Terminübersicht";
-                }
-            }
-            body {
-                font-family: Arial, sans-serif;
-                line-height: 1.6;
-                color: #333;
-            }
-            h1 {
-                color: #2c3e50;
-                border-bottom: 3px solid #3498db;
-                padding-bottom: 10px;
-            }
-            h2 {
-                color: #34495e;
-                margin-top: 30px;
-                border-left: 4px solid #3498db;
-                padding-left: 15px;
-            }
-            .meeting-info {
-                background-color: #f8f9fa;
-                padding: 15px;
-                margin: 10px 0;
-                border-radius: 5px;
-                border-left: 4px solid #28a745;
-            }
-            .summary {
-                background-color: #fff3cd;
-                padding: 15px;
-                margin: 10px 0;
-                border-radius: 5px;
-                border-left: 4px solid #ffc107;
-            }
-        ''')
-        
-        HTML(string=html_content).write_pdf(filename, stylesheets=[css])
-        
-        return filename
+            return self._save_export(meetings, 'html', self.iter_html)
+        
+        # Identical meeting sets give the same file, which is served from disk
+        meetings = list(meetings)
+        name = self._export_name(meetings, 'pdf')
+        
+        while True:
+            with self._pdf_lock:
+                filename = self.store.get(name)
+                if filename:
+                    print(f"📄 PDF-Export aus dem Cache: {filename}")
+                    return filename
+                
+                rendering = self._pdf_renders.get(name)
+                if rendering is None:
+                    rendering = self._pdf_renders[name] = threading.Event()
+                    break
+            
+            # Rendered by another request; if that failed, try again
+            rendering.wait()
+        
+        temp_path = self.store.temp_path('.pdf')
+        try:
+            if len(meetings) > self.pdf_chunk_threshold:
+                self._write_pdf_chunked(meetings, temp_path)
+            else:
+                HTML(string=self._generate_html_content(meetings)).write_pdf(temp_path, stylesheets=[self._pdf_css])
+            return self.store.add(temp_path, name)
+        finally:
+            # Never leave a partial file behind
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            with self._pdf_lock:
+                del self._pdf_renders[name]
+            rendering.set()
+    
+    def _write_pdf_chunked(self, meetings, filename):
+        """Lay out each month separately and merge the pages into one PDF"""
+        documents = []
+        for index, (month, month_meetings) in enumerate(itertools.groupby(meetings, self._meeting_month)):
+            html_content = ''.join(self._generate('export.html', month_meetings, heading=index == 0))
+            documents.append(HTML(string=html_content).render(stylesheets=[self._pdf_css]))
+        
+        pages = [page for document in documents for page in document.pages]
+        documents[0].copy(pages).write_pdf(filename)
+        print(f"📄 PDF-Export aus {len(documents)} Monaten zusammengesetzt")
+    
+    def _meeting_month(self, meeting):
+        # German dates (15.03.2024): month and year
+        return (meeting.get('date') or '')[3:]
+    
+    def _meetings_hash(self, meetings):
+        payload = json.dumps({'version': EXPORT_CACHE_VERSION, 'meetings': meetings},
+                             sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
     
     def _export_json(self, meetings, timestamp):
-        filename = os.path.join(self.export_folder, f"ratsinfo_export_{timestamp}.json")
-        
-        export_data = {
-            'export_date': datetime.now().isoformat(),
-            'meetings': meetings
-        }
-        
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(export_data, f, ensure_ascii=False, indent=2)
-        
-        return filename
+        return self._save_export(meetings, 'json', self.iter_json)
     
     def _generate_html_content(self, meetings):
-        html = """
-        <!DOCTYPE html>
-        <html lang="de">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Ratsinfo Lünen - Terminübersicht</title>
-            <style>
-                body {
-                    font-family: Arial, sans-serif;
-                    line-height: 1.6;
-                    color: #333;
-                    max-width: 800px;
-                    margin: 0 auto;
-                    padding: 20px;
-                }
-                h1 {
-                    color: #2c3e50;
-                    border-bottom: 3px solid #3498db;
-                    padding-bottom: 10px;
-                }
-                h2 {
-                    color: #34495e;
-                    margin-top: 30px;
-                    border-left: 4px solid #3498db;
-                    padding-left: 15px;
-                }
-                .meeting-info {
-                    background-color: #f8f9fa;
-                    padding: 15px;
-                    margin: 10px 0;
-                    border-radius: 5px;
-                    border-left: 4px solid #28a745;
-                }
-                .summary {
-                    background-color: #fff3cd;
-                    padding: 15px;
-                    margin: 10px 0;
-                    border-radius: 5px;
-                    border-left: 4px solid #ffc107;
-                }
-                .pdf-link {
-                    color: #007bff;
-                    text-decoration: none;
-                }
-                .pdf-link:hover {
-                    text-decoration: underline;
-                }
-                .timestamp {
-                    color: #6c757d;
-                    font-style: italic;
-                }
-            </style>
-        </head>
-        <body>
-            <h1>Ratsinfo Lünen - Terminübersicht</h1>
-            <p class="timestamp">Erstellt am: """ + datetime.now().strftime('%d.%m.%Y %H:%M') + """</p>
-            <hr>
-        """
-        
-        for meeting in meetings:
-            html += f"""
-            <h2>{meeting['title']}</h2>
-            <div class="meeting-info">
-                <strong>Datum:</strong> {meeting['date']}<br>
-                <strong>Uhrzeit:</strong> {meeting['time']}<br>
-                <strong>Ort:</strong> {meeting['location']}<br>
-                <strong>Gremium:</strong> {meeting['committee']}
-            </div>
-            """
-            
-            if meeting.get('summary'):
-                html += f"""
-                <div class="summary">
-                    <h3>Zusammenfassung</h3>
-                    <p>{meeting['summary']}</p>
-                </div>
-                """
-            
-            if meeting.get('pdf_url'):
-                html += f"""
-                <p><strong>PDF-Dokument:</strong> <a href="{meeting['pdf_url']}" class="pdf-link" target="_blank">Link zum Dokument</a></p>
-                """
-            
-            html += "<hr>"
-        
-        html += """
-        </body>
-        </html>
-        """
-        
-        return html
\ No newline at end of file
+        return ''.join(self.iter_html(meetings))
+    
+    def iter_html(self, meetings):
+        return self._generate('export.html', meetings)
+    
+    def _generate(self, template_name, meetings, heading=True):
+        """Render a template chunk by chunk; meetings are read while rendering"""
+        return get_export_template(template_name).generate(
+            meetings=meetings,
+            created=datetime.now().strftime('%d.%m.%Y %H:%M'),
+            heading=heading
+        )
@@ -0,0 +1,143 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+
+class ExportStore:
+    """Folder of generated export files with bounded retention.
+    
+    Files are written to a unique temporary file first and then named after
+    their content hash, or a name the caller derives from its input, so
+    concurrent exports never overwrite each other and identical exports are
+    stored once. collect() removes files older than
+    max_age seconds and then the least recently used ones until the folder
+    fits into max_bytes; start() runs it periodically in a daemon thread.
+    Files younger than min_age seconds are kept, as they may still be sent.
+    """
+    
+    PREFIX = 'ratsinfo_export_'
+    
+    def __init__(self, folder, max_bytes=500 * 1024 * 1024, max_age=7 * 24 * 3600, min_age=60):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.min_age = min_age
+        
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def path_for(self, name):
+        return os.path.join(self.folder, name)
+    
+    def get(self, name):
+        """Path of a stored export, None if it is not (or no longer) there"""
+        path = self.path_for(name)
+        try:
+            # The modification time doubles as last access for eviction
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+    
+    def temp_path(self, suffix=''):
+        """Unique file in the store folder to write an export into"""
+        fd, temp_path = tempfile.mkstemp(dir=self.folder, prefix=self.PREFIX, suffix=f'{suffix}.part')
+        os.close(fd)
+        return temp_path
+    
+    def add(self, temp_path, name):
+        """Move a finished file from temp_path into the store under name"""
+        with self._lock:
+            path = self.path_for(name)
+            if os.path.exists(path):
+                os.remove(temp_path)
+                os.utime(path)
+            else:
+                os.replace(temp_path, path)
+        return path
+    
+    def save(self, chunks, extension, name=None):
+        """Write text or bytes chunks and store them under name, by default their content hash"""
+        digest = hashlib.sha256()
+        temp_path = self.temp_path(f'.{extension}')
+        try:
+            with open(temp_path, 'wb') as f:
+                for chunk in chunks:
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode('utf-8')
+                    f.write(chunk)
+                    digest.update(chunk)
+            
+            return self.add(temp_path, name or f"{self.PREFIX}{digest.hexdigest()[:16]}.{extension}")
+        
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    
+    def total_size(self):
+        return sum(entry.stat().st_size for entry in self._entries())
+    
+    def collect(self, now=None):
+        """Remove expired exports, then the oldest until max_bytes is met; returns their number"""
+        now = now or time.time()
+        removed = 0
+        
+        with self._lock:
+            entries = []
+            for entry in self._entries():
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+            
+            entries.sort()
+            total = sum(size for mtime, size, path in entries)
+            for mtime, size, path in entries:
+                age = now - mtime
+                if age <= self.min_age:
+                    break
+                if age <= self.max_age and total <= self.max_bytes:
+                    continue
+                try:
+                    os.remove(path)
+                    total -= size
+                    removed += 1
+                except OSError:
+                    pass
+        
+        if removed:
+            print(f"🧹 {removed} alte Exporte entfernt")
+        return removed
+    
+    def start(self, interval):
+        """Run collect() every interval seconds in a daemon thread"""
+        if self._thread is not None:
+            return
+        
+        def run():
+            while not self._stop.is_set():
+                try:
+                    self.collect()
+                except Exception as e:
+                    print(f"Fehler beim Aufräumen der Exporte: {e}")
+                self._stop.wait(interval)
+        
+        self._thread = threading.Thread(target=run, name='export-gc', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+    
+    def _entries(self):
+        # Only our own files (including abandoned temporary ones), never .gitkeep etc.
+        return [
+            entry for entry in os.scandir(self.folder)
+            if entry.is_file() and entry.name.startswith(self.PREFIX)
+        ]
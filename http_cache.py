@@ -0,0 +1,211 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import hashlib
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+
+class HTTPCache:
+    """Persistent response cache stored in SQLite.
+    
+    Entries expire after a per-entry TTL and keep their ETag/Last-Modified
+    validators for conditional revalidation. The total size is bounded;
+    least recently used entries are evicted first.
+    """
+    
+    def __init__(self, path, max_bytes=500 * 1024 * 1024, max_entry_bytes=50 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    url TEXT,
+                    status INTEGER,
+                    headers TEXT,
+                    content BLOB,
+                    etag TEXT,
+                    last_modified TEXT,
+                    expires_at REAL,
+                    last_access REAL,
+                    size INTEGER
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses (last_access)")
+    
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, status, headers, content, etag, last_modified, expires_at "
+                "FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            
+            with self._conn:
+                self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+        
+        url, status, headers, content, etag, last_modified, expires_at = row
+        return {
+            'url': url,
+            'status': status,
+            'headers': json.loads(headers),
+            'content': content,
+            'etag': etag,
+            'last_modified': last_modified,
+            'expires_at': expires_at
+        }
+    
+    def set(self, key, url, status, headers, content, ttl):
+        if len(content) > self.max_entry_bytes:
+            return
+        
+        validators = CaseInsensitiveDict(headers)
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses "
+                    "(key, url, status, headers, content, etag, last_modified, expires_at, last_access, size) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, url, status, json.dumps(headers), content,
+                     validators.get('ETag'), validators.get('Last-Modified'),
+                     now + ttl, now, len(content))
+                )
+            self._evict()
+    
+    def refresh(self, key, ttl):
+        """Extend an entry after the server confirmed it is still current (304)"""
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE responses SET expires_at = ?, last_access = ? WHERE key = ?",
+                    (now + ttl, now, key)
+                )
+    
+    def total_size(self):
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+    
+    def clear(self):
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM responses")
+    
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall()
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        
+        with self._conn:
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        print(f"🧹 HTTP-Cache: {len(evicted)} Einträge entfernt")
+
+
+class CachedSession(requests.Session):
+    """requests.Session that serves GET/POST responses from an HTTPCache.
+    
+    Every request accepts two extra keyword arguments: cache=False bypasses
+    the cache, cache_ttl overrides the session's default lifetime in seconds.
+    Without a cache the session behaves like a plain requests.Session.
+    """
+    
+    # Headers that describe the wire format, not the stored (decoded) body
+    _DROPPED_HEADERS = ('content-encoding', 'transfer-encoding', 'content-length')
+    
+    def __init__(self, cache=None, default_ttl=3600):
+        super().__init__()
+        self.cache = cache
+        self.default_ttl = default_ttl
+    
+    def request(self, method, url, cache=True, cache_ttl=None, **kwargs):
+        method = method.upper()
+        if self.cache is None or not cache or method not in ('GET', 'POST'):
+            return super().request(method, url, **kwargs)
+        
+        ttl = self.default_ttl if cache_ttl is None else cache_ttl
+        key = self._cache_key(method, url, kwargs)
+        entry = self.cache.get(key)
+        
+        if entry and entry['expires_at'] > time.time():
+            return self._build_response(entry)
+        
+        if entry and (entry['etag'] or entry['last_modified']):
+            headers = dict(kwargs.get('headers') or {})
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+            kwargs['headers'] = headers
+        
+        response = super().request(method, url, **kwargs)
+        
+        if entry and response.status_code == 304:
+            self.cache.refresh(key, ttl)
+            return self._build_response(entry)
+        
+        if response.status_code == 200 and ttl > 0:
+            self._store(key, response, ttl, kwargs.get('stream', False))
+        
+        return response
+    
+    def _cache_key(self, method, url, kwargs):
+        prepared = requests.Request(
+            method, url,
+            params=kwargs.get('params'),
+            data=kwargs.get('data'),
+            json=kwargs.get('json')
+        ).prepare()
+        body = prepared.body or b''
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        return hashlib.sha256(f"{method} {prepared.url}\n".encode('utf-8') + body).hexdigest()
+    
+    def _store(self, key, response, ttl, stream):
+        if stream:
+            # Only buffer streamed bodies whose announced size fits into the cache
+            length = response.headers.get('Content-Length')
+            if not length or not length.isdigit() or int(length) > self.cache.max_entry_bytes:
+                return
+        
+        content = response.content
+        headers = {
+            name: value for name, value in response.headers.items()
+            if name.lower() not in self._DROPPED_HEADERS
+        }
+        self.cache.set(key, response.url, response.status_code, headers, content, ttl)
+    
+    def _build_response(self, entry):
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.reason = 'OK'
+        response.url = entry['url']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.headers['Content-Length'] = str(len(entry['content']))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = entry['content']
+        response._content_consumed = True
+        response.from_cache = True
+        return response
@@ -0,0 +1,177 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once its cancellation was requested"""
+
+
+class Job:
+    """State of one background job, shared by the worker and request threads.
+    
+    status is one of 'queued', 'running', 'done', 'failed' or 'cancelled'.
+    progress is a free-form dict of counters; results holds the partial
+    results collected so far.
+    
+    Every change is also appended to an event log ('result', 'progress',
+    'status'), which subscribers read with wait_events().
+    """
+    
+    FINISHED = ('done', 'failed', 'cancelled')
+    
+    def __init__(self, job_id, kind):
+        self.id = job_id
+        self.kind = kind
+        self.status = 'queued'
+        self.progress = {}
+        self.results = []
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._events = []
+        self._cancel_requested = threading.Event()
+    
+    @property
+    def finished(self):
+        return self.status in self.FINISHED
+    
+    @property
+    def cancelled(self):
+        return self._cancel_requested.is_set()
+    
+    def cancel(self):
+        self._cancel_requested.set()
+    
+    def check_cancelled(self):
+        """Called by the job at safe points; aborts it after cancel()"""
+        if self._cancel_requested.is_set():
+            raise JobCancelled()
+    
+    def update_progress(self, **counters):
+        with self._lock:
+            self.progress.update(counters)
+            self._publish('progress', dict(self.progress))
+    
+    def set_results(self, results):
+        with self._lock:
+            self.results = list(results)
+            for index, result in enumerate(self.results):
+                self._publish('result', {'index': index, 'result': result})
+    
+    def update_result(self, index, result):
+        with self._lock:
+            self.results[index] = result
+            self._publish('result', {'index': index, 'result': result})
+    
+    def set_status(self, status, error=None):
+        with self._lock:
+            self.status = status
+            self.error = error
+            if status in self.FINISHED:
+                self.finished_at = time.time()
+            self._publish('status', {'status': status, 'error': error})
+    
+    def wait_events(self, position, timeout=None):
+        """Events after the first position ones as (events, finished).
+        
+        Blocks up to timeout seconds while there is nothing new and the job
+        is still running.
+        """
+        with self._changed:
+            if len(self._events) <= position and not self.finished:
+                self._changed.wait(timeout)
+            return self._events[position:], self.finished
+    
+    def _publish(self, event, data):
+        # Caller holds self._lock
+        self._events.append((event, data))
+        self._changed.notify_all()
+    
+    def to_dict(self):
+        with self._lock:
+            return {
+                'id': self.id,
+                'kind': self.kind,
+                'status': self.status,
+                'progress': dict(self.progress),
+                'results': list(self.results),
+                'error': self.error
+            }
+
+
+class JobManager:
+    """Runs jobs on a small background thread pool.
+    
+    Finished jobs are kept for keep_seconds so clients can fetch their
+    results; at most max_finished of them are kept at any time.
+    """
+    
+    def __init__(self, max_workers=2, keep_seconds=3600, max_finished=50):
+        self.keep_seconds = keep_seconds
+        self.max_finished = max_finished
+        
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def submit(self, kind, func, *args):
+        """Start func(*args, job=job) in the background and return the job"""
+        job = Job(uuid.uuid4().hex, kind)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        
+        self._executor.submit(self._run, job, func, args)
+        return job
+    
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def active_count(self, kind=None):
+        """Number of queued or running jobs, optionally of one kind only"""
+        with self._lock:
+            return sum(
+                1 for job in self._jobs.values()
+                if not job.finished and (kind is None or job.kind == kind)
+            )
+    
+    def cancel(self, job_id):
+        """Request cancellation; False if the job is unknown"""
+        job = self.get(job_id)
+        if job is None:
+            return False
+        job.cancel()
+        return True
+    
+    def _run(self, job, func, args):
+        if job.cancelled:
+            job.set_status('cancelled')
+            return
+        
+        job.set_status('running')
+        try:
+            func(*args, job=job)
+            job.set_status('cancelled' if job.cancelled else 'done')
+        except JobCancelled:
+            print(f"⏹️ Job {job.id} abgebrochen")
+            job.set_status('cancelled')
+        except Exception as e:
+            print(f"Fehler in Job {job.id}: {e}")
+            job.set_status('failed', error=str(e))
+    
+    def _prune(self):
+        now = time.time()
+        finished = [job for job in self._jobs.values() if job.finished]
+        expired = [job for job in finished if now - job.finished_at > self.keep_seconds]
+        # Oldest first, so the most recent results survive
+        surplus = finished[:max(0, len(finished) - self.max_finished)]
+        
+        for job in expired + surplus:
+            self._jobs.pop(job.id, None)
@@ -3,6 +3,7 @@
 Windows launcher for Lünen Terminplaner
 """
 
+import multiprocessing
 import os
 import sys
 import subprocess
@@ -46,7 +47,7 @@ def main():
     
     # Import Flask app after installation
     try:
-        from app import app
+        from app import app, start_background_services
     except ImportError as e:
         print(f"❌ Fehler beim Laden der App: {e}")
         input("Drücken Sie Enter zum Beenden...")
@@ -56,6 +57,9 @@ def main():
     print("📝 Zum Beenden: Strg+C drücken")
     print("-" * 40)
     
+    # Keep the local meeting store up to date
+    start_background_services()
+    
     # Start browser in separate thread
     browser_thread = threading.Thread(target=open_browser)
     browser_thread.daemon = True
@@ -73,4 +77,6 @@ def main():
     return 0
 
 if __name__ == '__main__':
+    # Spawned PDF worker processes must not start the app again in frozen builds
+    multiprocessing.freeze_support()
     sys.exit(main())
@@ -4,6 +4,7 @@ Standalone executable entry point for Lünen Terminplaner
 Optimized for PyInstaller compilation
 """
 
+import multiprocessing
 import os
 import sys
 import threading
@@ -37,7 +38,10 @@ def main():
     
     try:
         # Import Flask app
-        from app import app
+        from app import app, start_background_services
+        
+        # Keep the local meeting store up to date
+        start_background_services()
         
         # Start browser in separate thread
         browser_thread = threading.Thread(target=open_browser)
@@ -66,4 +70,6 @@ def main():
         return 1
 
 if __name__ == '__main__':
+    # Spawned PDF worker processes must not start the app again in frozen builds
+    multiprocessing.freeze_support()
     sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,202 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def _entry_size(meeting):
+    """Approximate memory/storage cost of a meeting entry in bytes"""
+    return len(json.dumps(meeting, ensure_ascii=False).encode('utf-8'))
+
+
+class MemoryMeetingCache:
+    """In-memory LRU cache for processed meetings with a size budget.
+    
+    Supports the dict operations the app uses (get, [], in, del, len).
+    Once the entries exceed max_bytes, the least recently used ones are
+    dropped.
+    """
+    
+    def __init__(self, max_bytes=50 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+    
+    def get(self, meeting_id, default=None):
+        with self._lock:
+            entry = self._entries.get(meeting_id)
+            if entry is None:
+                return default
+            self._entries.move_to_end(meeting_id)
+            return entry[0]
+    
+    def __getitem__(self, meeting_id):
+        meeting = self.get(meeting_id)
+        if meeting is None:
+            raise KeyError(meeting_id)
+        return meeting
+    
+    def __setitem__(self, meeting_id, meeting):
+        size = _entry_size(meeting)
+        with self._lock:
+            self._pop(meeting_id)
+            self._entries[meeting_id] = (meeting, size)
+            self._size += size
+            self._evict(keep=meeting_id)
+    
+    def __delitem__(self, meeting_id):
+        with self._lock:
+            if not self._pop(meeting_id):
+                raise KeyError(meeting_id)
+    
+    def __contains__(self, meeting_id):
+        with self._lock:
+            return meeting_id in self._entries
+    
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+    
+    def total_size(self):
+        with self._lock:
+            return self._size
+    
+    def _pop(self, meeting_id):
+        entry = self._entries.pop(meeting_id, None)
+        if entry is None:
+            return False
+        self._size -= entry[1]
+        return True
+    
+    def _evict(self, keep=None):
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            meeting_id = next(iter(self._entries))
+            if meeting_id == keep:
+                self._entries.move_to_end(meeting_id)
+                continue
+            self._pop(meeting_id)
+
+
+class SQLiteMeetingCache:
+    """Persistent meeting cache in SQLite with an in-memory LRU in front.
+    
+    Entries survive restarts, so detail pages keep working for meetings
+    scraped before. The database is bounded by max_bytes; least recently
+    used meetings are deleted first.
+    """
+    
+    def __init__(self, path, max_bytes=200 * 1024 * 1024, memory_max_bytes=10 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.memory = MemoryMeetingCache(memory_max_bytes)
+        
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS meetings (
+                    id TEXT PRIMARY KEY,
+                    data TEXT,
+                    size INTEGER,
+                    last_access REAL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_meetings_access ON meetings (last_access)")
+    
+    def get(self, meeting_id, default=None):
+        meeting = self.memory.get(meeting_id)
+        if meeting is not None:
+            return meeting
+        
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM meetings WHERE id = ?", (meeting_id,)).fetchone()
+            if row is None:
+                return default
+            with self._conn:
+                self._conn.execute("UPDATE meetings SET last_access = ? WHERE id = ?", (time.time(), meeting_id))
+        
+        meeting = json.loads(row[0])
+        self.memory[meeting_id] = meeting
+        return meeting
+    
+    def __getitem__(self, meeting_id):
+        meeting = self.get(meeting_id)
+        if meeting is None:
+            raise KeyError(meeting_id)
+        return meeting
+    
+    def __setitem__(self, meeting_id, meeting):
+        data = json.dumps(meeting, ensure_ascii=False)
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meetings (id, data, size, last_access) VALUES (?, ?, ?, ?)",
+                    (meeting_id, data, len(data.encode('utf-8')), time.time())
+                )
+            self._evict(keep=meeting_id)
+        self.memory[meeting_id] = meeting
+    
+    def __delitem__(self, meeting_id):
+        self._forget(meeting_id)
+        with self._lock:
+            with self._conn:
+                deleted = self._conn.execute("DELETE FROM meetings WHERE id = ?", (meeting_id,)).rowcount
+        if not deleted:
+            raise KeyError(meeting_id)
+    
+    def __contains__(self, meeting_id):
+        if meeting_id in self.memory:
+            return True
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM meetings WHERE id = ?", (meeting_id,)).fetchone() is not None
+    
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM meetings").fetchone()[0]
+    
+    def total_size(self):
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM meetings").fetchone()[0]
+    
+    def _forget(self, meeting_id):
+        try:
+            del self.memory[meeting_id]
+        except KeyError:
+            pass
+    
+    def _evict(self, keep=None):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM meetings").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        
+        rows = self._conn.execute("SELECT id, size FROM meetings ORDER BY last_access").fetchall()
+        evicted = []
+        for meeting_id, size in rows:
+            if total <= self.max_bytes:
+                break
+            if meeting_id == keep:
+                continue
+            evicted.append(meeting_id)
+            total -= size
+        
+        with self._conn:
+            self._conn.executemany("DELETE FROM meetings WHERE id = ?", [(meeting_id,) for meeting_id in evicted])
+        for meeting_id in evicted:
+            self._forget(meeting_id)
+        print(f"🧹 Meeting-Cache: {len(evicted)} Einträge entfernt")
+
+
+def create_meeting_cache(backend, folder, max_bytes):
+    """Meeting cache for the configured backend ('memory' or 'sqlite')"""
+    if backend == 'memory':
+        return MemoryMeetingCache(max_bytes)
+    if backend == 'sqlite':
+        return SQLiteMeetingCache(os.path.join(folder, 'meetings.sqlite3'), max_bytes=max_bytes)
+    raise ValueError(f"Unbekanntes Meeting-Cache-Backend: {backend}")
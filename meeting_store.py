@@ -0,0 +1,417 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from scraper import ScrapeError, meeting_id
+
+
+# Fields stored in their own columns; anything else goes into the JSON 'extra' column
+MEETING_COLUMNS = ('title', 'date', 'time', 'location', 'committee', 'detail_url', 'pdf_url')
+
+
+def _iso_date(date_str):
+    """German listing date (15.03.2024) as sortable ISO date, None if unknown"""
+    for date_format in ('%d.%m.%Y', '%Y-%m-%d', '%d.%m.%y'):
+        try:
+            return datetime.strptime(date_str, date_format).strftime('%Y-%m-%d')
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def _month_start(year, month):
+    return datetime(year, month, 1)
+
+
+def _next_month_start(year, month):
+    return datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+
+
+class MeetingStore:
+    """Local SQLite repository of meeting listings.
+    
+    Meetings are stored by their stable meeting_id() with the date in ISO
+    form, indexed by date and committee. Each synced month is recorded with
+    its sync time, so MeetingSyncer knows which months are up to date.
+    A committee index with meeting counts and first/last meeting dates is
+    maintained alongside and kept in memory for committee_index().
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS meetings (
+                    id TEXT PRIMARY KEY,
+                    iso_date TEXT,
+                    title TEXT,
+                    date TEXT,
+                    time TEXT,
+                    location TEXT,
+                    committee TEXT,
+                    detail_url TEXT,
+                    pdf_url TEXT,
+                    extra TEXT,
+                    updated_at REAL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_meetings_date ON meetings (iso_date, time)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_meetings_committee ON meetings (committee, iso_date)")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS synced_months (
+                    year INTEGER,
+                    month INTEGER,
+                    synced_at REAL,
+                    meeting_count INTEGER,
+                    PRIMARY KEY (year, month)
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS committees (
+                    name TEXT PRIMARY KEY,
+                    meeting_count INTEGER,
+                    first_seen TEXT,
+                    last_seen TEXT
+                )
+            """)
+            # Stores created before the index existed are indexed once
+            if self._conn.execute("SELECT COUNT(*) FROM committees").fetchone()[0] == 0:
+                names = [row[0] for row in self._conn.execute("SELECT DISTINCT committee FROM meetings")]
+                self._update_committees(names)
+        
+        self._committee_index = {
+            row['name']: {
+                'count': row['meeting_count'],
+                'first_seen': row['first_seen'],
+                'last_seen': row['last_seen']
+            }
+            for row in self._conn.execute("SELECT * FROM committees")
+        }
+    
+    def replace_month(self, year, month, meetings):
+        """Store the complete listing of one month and mark it as synced.
+        
+        Meetings that vanished from the listing are removed. A known PDF
+        link is kept as long as the meeting's detail page did not change.
+        """
+        month_start = _month_start(year, month).strftime('%Y-%m-%d')
+        month_end = _next_month_start(year, month).strftime('%Y-%m-%d')
+        now = time.time()
+        
+        rows = {}
+        for meeting in meetings:
+            iso_date = _iso_date(meeting.get('date'))
+            if iso_date is None or not month_start <= iso_date < month_end:
+                print(f"⚠️ Termin ohne passendes Datum übersprungen: {meeting.get('title', 'N/A')} ({meeting.get('date')})")
+                continue
+            rows[meeting_id(meeting)] = self._row(meeting, iso_date, now)
+        
+        with self._lock:
+            with self._conn:
+                known = {
+                    row['id']: row for row in self._conn.execute(
+                        "SELECT id, committee, detail_url, pdf_url FROM meetings WHERE iso_date >= ? AND iso_date < ?",
+                        (month_start, month_end)
+                    )
+                }
+                removed = [(stored_id,) for stored_id in known if stored_id not in rows]
+                self._conn.executemany("DELETE FROM meetings WHERE id = ?", removed)
+                
+                for stored_id, row in rows.items():
+                    previous = known.get(stored_id)
+                    if row['pdf_url'] is None and previous and previous['detail_url'] == row['detail_url']:
+                        row['pdf_url'] = previous['pdf_url']
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO meetings "
+                        "(id, iso_date, title, date, time, location, committee, detail_url, pdf_url, extra, updated_at) "
+                        "VALUES (:id, :iso_date, :title, :date, :time, :location, :committee, "
+                        ":detail_url, :pdf_url, :extra, :updated_at)",
+                        dict(row, id=stored_id)
+                    )
+                
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO synced_months (year, month, synced_at, meeting_count) VALUES (?, ?, ?, ?)",
+                    (year, month, now, len(rows))
+                )
+                
+                changed = {row['committee'] for row in known.values()}
+                changed.update(row['committee'] for row in rows.values())
+                entries = self._update_committees(changed)
+            
+            for name, entry in entries.items():
+                if entry is None:
+                    self._committee_index.pop(name, None)
+                else:
+                    self._committee_index[name] = entry
+    
+    def set_pdf_urls(self, pdf_urls):
+        """Store resolved PDF links; '' marks a meeting checked without PDF"""
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "UPDATE meetings SET pdf_url = ? WHERE id = ?",
+                    [(pdf_url or '', stored_id) for stored_id, pdf_url in pdf_urls.items()]
+                )
+    
+    def query(self, start_date, end_date, committees=None):
+        """Meetings between start_date and end_date (inclusive) in date order"""
+        sql = "SELECT * FROM meetings WHERE iso_date >= ? AND iso_date <= ?"
+        params = [start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')]
+        if committees:
+            committees = list(committees)
+            sql += f" AND committee IN ({', '.join('?' * len(committees))})"
+            params.extend(committees)
+        sql += " ORDER BY iso_date, time, committee"
+        
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._meeting(row) for row in rows]
+    
+    def committees(self, start_date=None, end_date=None):
+        """Distinct committee names, optionally limited to a date range"""
+        sql = "SELECT DISTINCT committee FROM meetings WHERE committee <> ''"
+        params = []
+        if start_date:
+            sql += " AND iso_date >= ?"
+            params.append(start_date.strftime('%Y-%m-%d'))
+        if end_date:
+            sql += " AND iso_date <= ?"
+            params.append(end_date.strftime('%Y-%m-%d'))
+        
+        with self._lock:
+            return sorted(row['committee'] for row in self._conn.execute(sql, params))
+    
+    def committee_index(self):
+        """Committee name -> {'count', 'first_seen', 'last_seen'} over all stored meetings.
+        
+        The index is kept up to date by replace_month() and served from
+        memory, so reading it never touches the database.
+        """
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._committee_index.items()}
+    
+    def month_status(self, year, month):
+        """(synced_at, meeting_count) of a month, None if never synced"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT synced_at, meeting_count FROM synced_months WHERE year = ? AND month = ?",
+                (year, month)
+            ).fetchone()
+        return (row['synced_at'], row['meeting_count']) if row else None
+    
+    def _update_committees(self, names):
+        """Recount the given committees; returns name -> entry, None for removed ones"""
+        entries = {}
+        for name in names:
+            if not name:
+                continue
+            count, first_seen, last_seen = self._conn.execute(
+                "SELECT COUNT(*), MIN(iso_date), MAX(iso_date) FROM meetings WHERE committee = ?",
+                (name,)
+            ).fetchone()
+            if count:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO committees (name, meeting_count, first_seen, last_seen) VALUES (?, ?, ?, ?)",
+                    (name, count, first_seen, last_seen)
+                )
+                entries[name] = {'count': count, 'first_seen': first_seen, 'last_seen': last_seen}
+            else:
+                self._conn.execute("DELETE FROM committees WHERE name = ?", (name,))
+                entries[name] = None
+        return entries
+    
+    def _row(self, meeting, iso_date, now):
+        row = {column: meeting.get(column) for column in MEETING_COLUMNS}
+        extra = {
+            key: value for key, value in meeting.items()
+            if key not in MEETING_COLUMNS and key not in ('id', 'iso_date')
+        }
+        row.update(iso_date=iso_date, extra=json.dumps(extra, ensure_ascii=False), updated_at=now)
+        return row
+    
+    def _meeting(self, row):
+        meeting = json.loads(row['extra'] or '{}')
+        meeting.update({column: row[column] for column in MEETING_COLUMNS})
+        meeting['id'] = row['id']
+        meeting['iso_date'] = row['iso_date']
+        return meeting
+
+
+class MeetingSyncer:
+    """Keeps a MeetingStore up to date with the upstream listings.
+    
+    Past months that were synced after they ended are treated as final and
+    never fetched again. The current and future months, and past months
+    that came back empty, are fetched again once their last sync is older
+    than refresh_interval seconds. Stale months next to each other are
+    fetched with one fetch_listings(start_date, end_date, progress) call.
+    """
+    
+    def __init__(self, store, fetch_listings, refresh_interval=900):
+        self.store = store
+        self.fetch_listings = fetch_listings
+        self.refresh_interval = refresh_interval
+        
+        self._lock = threading.Lock()
+        # (year, month) -> Event set once the month's fetch has finished
+        self._in_flight = {}
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def is_stale(self, year, month, now=None):
+        now = now or datetime.now()
+        status = self.store.month_status(year, month)
+        if status is None:
+            return True
+        
+        synced_at, meeting_count = status
+        month_end = _next_month_start(year, month)
+        if month_end <= now and synced_at >= month_end.timestamp() and meeting_count > 0:
+            return False
+        return now.timestamp() - synced_at > self.refresh_interval
+    
+    def sync_range(self, start_date, end_date, progress=None):
+        """Fetch all stale months between start_date and end_date; returns their number.
+        
+        A group of months whose fetch fails (ScrapeError) keeps its stored
+        meetings and stays stale, so it is tried again on the next call. The
+        error is only raised if none of these months was ever synced.
+        """
+        # Stale months are claimed under the lock but fetched outside it, so
+        # callers whose months are already stored never wait for the network
+        with self._lock:
+            months = self._month_range(start_date, end_date)
+            stale = [month for month in months if self.is_stale(*month)]
+            claimed = [month for month in stale if month not in self._in_flight]
+            waiting = [self._in_flight[month] for month in stale if month in self._in_flight]
+            for month in claimed:
+                self._in_flight[month] = threading.Event()
+        
+        try:
+            failed = self._fetch_months(claimed, progress)
+        finally:
+            with self._lock:
+                for month in claimed:
+                    self._in_flight.pop(month).set()
+        
+        # Months another caller is fetching right now are read once it is done
+        for fetched in waiting:
+            fetched.wait()
+        
+        if claimed:
+            print(f"🔄 {len(claimed) - failed} von {len(months)} Monaten synchronisiert")
+        return len(claimed) - failed
+    
+    def _fetch_months(self, months, progress):
+        """Fetch and store the given months; returns the number that failed"""
+        months_done = 0
+        failed = 0
+        
+        for group in self._contiguous(months):
+            def report(done, total, offset=months_done):
+                if progress:
+                    progress(offset + done, len(months))
+            
+            group_start = _month_start(*group[0])
+            group_end = datetime.fromtimestamp(_next_month_start(*group[-1]).timestamp() - 1)
+            months_done += len(group)
+            try:
+                listings = self.fetch_listings(group_start, group_end, progress=report)
+            except ScrapeError as e:
+                if not any(self.store.month_status(*month) for month in group):
+                    raise
+                print(f"⚠️ Monate ab {group_start.strftime('%m/%Y')} nicht synchronisiert: {e}")
+                failed += len(group)
+                continue
+            
+            if not listings and self._had_meetings(group):
+                # An empty answer for months that had meetings is far more
+                # likely an upstream problem than a mass cancellation
+                print(f"⚠️ Leere Liste für Monate ab {group_start.strftime('%m/%Y')}, Bestand bleibt erhalten")
+                failed += len(group)
+                continue
+            
+            by_month = {}
+            for meeting in listings:
+                iso_date = _iso_date(meeting.get('date'))
+                if iso_date:
+                    by_month.setdefault((int(iso_date[:4]), int(iso_date[5:7])), []).append(meeting)
+            
+            for year, month in group:
+                self.store.replace_month(year, month, by_month.get((year, month), []))
+        
+        return failed
+    
+    def _had_meetings(self, months):
+        for year, month in months:
+            status = self.store.month_status(year, month)
+            if status and status[1] > 0:
+                return True
+        return False
+    
+    def start(self, interval, lookback_months=1, lookahead_months=3, initial_range=None):
+        """Sync the months around today every interval seconds in a daemon thread.
+        
+        initial_range, a (start_date, end_date) tuple, is synced once after
+        the first regular sync, e.g. to fill a wider window on startup.
+        """
+        if self._thread is not None:
+            return
+        
+        def run():
+            pending_range = initial_range
+            while not self._stop.is_set():
+                today = datetime.now()
+                try:
+                    self.sync_range(self._shift_months(today, -lookback_months),
+                                    self._shift_months(today, lookahead_months))
+                except Exception as e:
+                    print(f"Fehler bei der Synchronisierung: {e}")
+                
+                if pending_range and not self._stop.is_set():
+                    try:
+                        self.sync_range(*pending_range)
+                        pending_range = None
+                    except Exception as e:
+                        # Tried again with the next regular sync
+                        print(f"Fehler bei der ersten Synchronisierung: {e}")
+                
+                self._stop.wait(interval)
+        
+        self._thread = threading.Thread(target=run, name='meeting-sync', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+    
+    def _month_range(self, start_date, end_date):
+        months = []
+        year, month = start_date.year, start_date.month
+        while (year, month) <= (end_date.year, end_date.month):
+            months.append((year, month))
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return months
+    
+    def _contiguous(self, months):
+        groups = []
+        for year, month in months:
+            if groups and _next_month_start(*groups[-1][-1]) == _month_start(year, month):
+                groups[-1].append((year, month))
+            else:
+                groups.append([(year, month)])
+        return groups
+    
+    def _shift_months(self, date, months):
+        index = date.year * 12 + date.month - 1 + months
+        return datetime(index // 12, index % 12 + 1, 1)
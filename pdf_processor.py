@@ -16,6 +16,9 @@ except ImportError:
         PDF_LIB = None
         print("Warning: No PDF library available. PDF processing will be limited.")
 
+# Bump when _clean_text or the extraction logic changes, invalidates cached text
+TEXT_EXTRACTION_VERSION = 2
+
 from urllib.parse import urlparse
 from pathlib import Path
 import hashlib
@@ -24,12 +27,32 @@ from sumy.parsers.plaintext import PlaintextParser
 from sumy.nlp.tokenizers import Tokenizer
 from sumy.summarizers.lsa import LsaSummarizer
 from sumy.nlp.stemmers import Stemmer
+from sumy.models.dom import ObjectDocumentModel, Paragraph
 
 import re
+import threading
+import time
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from http_cache import CachedSession
+from pdf_store import PDFStore
+
+
+def _read_fitz_pages(pdf_path, start, stop):
+    """Raw text of pages start..stop-1; runs in a page worker process"""
+    doc = fitz.open(pdf_path)
+    try:
+        return [doc[page_num].get_text() for page_num in range(start, stop)]
+    finally:
+        doc.close()
 
 class PDFProcessor:
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, http_cache=None, cache_ttl=24 * 3600, pdf_store_max_bytes=2 * 1024 * 1024 * 1024,
+                 text_cache=None, summary_max_sentences=400, summary_chunk_sentences=200,
+                 summary_time_budget=30.0, page_workers=0, parallel_page_threshold=200, cpu_budget=None):
+        self.session = CachedSession(http_cache, default_ttl=cache_ttl)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
@@ -37,73 +60,229 @@ class PDFProcessor:
         self.stemmer = Stemmer("german")
         self.summarizer = LsaSummarizer(self.stemmer)
         self.summarizer.stop_words = self._get_german_stopwords()
+        
+        # One content-addressed store per download folder
+        self.pdf_store_max_bytes = pdf_store_max_bytes
+        self._stores = {}
+        self._stores_lock = threading.Lock()
+        
+        # Optional pdf_store.TextCache for extracted text
+        self.text_cache = text_cache
+        
+        # Recently computed sentence rankings, keyed by text hash
+        self._ranking_cache = OrderedDict()
+        self._ranking_cache_size = 32
+        self._ranking_lock = threading.Lock()
+        
+        # Documents above summary_max_sentences are ranked chunk by chunk so
+        # the SVD size stays bounded; summary_time_budget caps the wall time
+        self.summary_max_sentences = summary_max_sentences
+        self.summary_chunk_sentences = summary_chunk_sentences
+        self.summary_time_budget = summary_time_budget
+        
+        # PDFs with at least parallel_page_threshold pages are read by
+        # page_workers processes in parallel (fitz only, 0 or 1 disables);
+        # with a cpu_budget (pipeline.CPUBudget) only as many as CPUs are idle
+        self.page_workers = page_workers
+        self.parallel_page_threshold = parallel_page_threshold
+        self.cpu_budget = cpu_budget
     
     def download_pdf(self, pdf_url, download_folder):
         if not pdf_url:
             return None
-            
+        
         try:
-            response = self.session.get(pdf_url, stream=True)
-            response.raise_for_status()
+            store = self._get_store(download_folder)
+            entry = store.lookup(pdf_url)
             
-            url_hash = hashlib.md5(pdf_url.encode()).hexdigest()[:8]
-            filename = f"document_{url_hash}.pdf"
-            filepath = os.path.join(download_folder, filename)
+            headers = {}
+            if entry:
+                if entry.get('etag'):
+                    headers['If-None-Match'] = entry['etag']
+                if entry.get('last_modified'):
+                    headers['If-Modified-Since'] = entry['last_modified']
+                if not headers:
+                    # Nothing to revalidate against, the stored copy is used as is
+                    return store.touch(pdf_url)
             
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            # The PDF store is the cache for documents, skip the HTTP cache
+            response = self.session.get(pdf_url, stream=True, headers=headers, cache=False)
+            if entry and response.status_code == 304:
+                print(f"📄 PDF unverändert, nutze lokale Kopie: {pdf_url}")
+                return store.touch(pdf_url)
             
-            return filepath
+            response.raise_for_status()
             
+            validators = self._response_validators(response)
+            return store.save(
+                pdf_url,
+                response.iter_content(chunk_size=8192),
+                etag=validators.get('ETag'),
+                last_modified=validators.get('Last-Modified'),
+                expected_size=validators.get('Content-Length')
+            )
+        
         except Exception as e:
             print(f"Fehler beim Download der PDF {pdf_url}: {e}")
             return None
     
+    def _get_store(self, download_folder):
+        with self._stores_lock:
+            folder = os.path.abspath(download_folder)
+            if folder not in self._stores:
+                self._stores[folder] = PDFStore(folder, max_bytes=self.pdf_store_max_bytes)
+            return self._stores[folder]
+    
+    def _response_validators(self, response):
+        """ETag, Last-Modified and Content-Length of a download, where present"""
+        validators = {}
+        for name in ('ETag', 'Last-Modified', 'Content-Length'):
+            value = response.headers.get(name)
+            if isinstance(value, str) and value:
+                validators[name] = value
+        
+        # Content-Length is only meaningful for uncompressed transfers
+        if 'Content-Length' in validators:
+            encoding = response.headers.get('Content-Encoding')
+            if validators['Content-Length'].isdigit() and not (isinstance(encoding, str) and encoding):
+                validators['Content-Length'] = int(validators['Content-Length'])
+            else:
+                del validators['Content-Length']
+        return validators
+    
     def extract_text(self, pdf_path):
         if not pdf_path or not os.path.exists(pdf_path):
             return ""
         
+        if self.text_cache is None or PDF_LIB is None:
+            return self._extract_text_uncached(pdf_path)
+        
+        content_hash = self._content_hash(pdf_path)
+        version = self._extractor_version()
+        text = self.text_cache.get(content_hash, PDF_LIB, version)
+        if text is not None:
+            print(f"📄 Text aus Cache: {os.path.basename(pdf_path)}")
+            return text
+        
+        text = self._extract_text_uncached(pdf_path)
+        # Empty text usually means a failed extraction, do not cache it
+        if text:
+            try:
+                self.text_cache.set(content_hash, PDF_LIB, version, text)
+            except OSError as e:
+                # E.g. a full disk; the extraction itself succeeded
+                print(f"Text konnte nicht zwischengespeichert werden: {e}")
+        return text
+    
+    def _content_hash(self, pdf_path):
+        # Files from the PDF store are already named by their SHA-256
+        name = os.path.basename(pdf_path)
+        if re.fullmatch(r'[0-9a-f]{64}\.pdf', name):
+            return name[:-4]
+        
+        digest = hashlib.sha256()
+        with open(pdf_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def _extractor_version(self):
         if PDF_LIB == 'fitz':
-            return self._extract_text_fitz(pdf_path)
+            library_version = getattr(fitz, 'VersionBind', '')
         elif PDF_LIB == 'pdfplumber':
-            return self._extract_text_pdfplumber(pdf_path)
+            import pdfplumber
+            library_version = getattr(pdfplumber, '__version__', '')
         else:
+            library_version = ''
+        return f"{library_version}+{TEXT_EXTRACTION_VERSION}"
+    
+    def _extract_text_uncached(self, pdf_path):
+        if PDF_LIB is None:
             print("No PDF library available for text extraction")
             return ""
+        return self._join_page_texts(pdf_path)
+    
+    def iter_page_texts(self, pdf_path):
+        """Yield the cleaned text of each non-empty page in page order.
+        
+        Pages are read one at a time, so callers can stop early or process
+        large documents without holding the whole text in memory.
+        Extraction errors are raised to the caller.
+        """
+        if PDF_LIB == 'fitz':
+            pages = self._iter_pages_fitz(pdf_path)
+        elif PDF_LIB == 'pdfplumber':
+            pages = self._iter_pages_pdfplumber(pdf_path)
+        else:
+            return
+        
+        for page_text in pages:
+            page_text = self._clean_text(page_text)
+            if page_text:
+                yield page_text
     
-    def _extract_text_fitz(self, pdf_path):
+    def _iter_pages_fitz(self, pdf_path):
+        doc = fitz.open(pdf_path)
+        try:
+            page_count = doc.page_count
+            if self.page_workers <= 1 or page_count < self.parallel_page_threshold:
+                for page_num in range(page_count):
+                    yield doc[page_num].get_text()
+                return
+        finally:
+            doc.close()
+        
+        # This process only waits for its page workers, so its own CPU counts as one of them
+        extra = self.page_workers - 1
+        if self.cpu_budget is not None:
+            extra = self.cpu_budget.reserve(extra)
+        try:
+            if extra < 1:
+                yield from self._iter_pages_fitz_sequential(pdf_path)
+            else:
+                yield from self._iter_pages_fitz_parallel(pdf_path, page_count, extra + 1)
+        finally:
+            if self.cpu_budget is not None:
+                self.cpu_budget.release(extra)
+    
+    def _iter_pages_fitz_sequential(self, pdf_path):
+        doc = fitz.open(pdf_path)
         try:
-            doc = fitz.open(pdf_path)
-            text = ""
-            
             for page_num in range(doc.page_count):
-                page = doc[page_num]
-                text += page.get_text()
-            
+                yield doc[page_num].get_text()
+        finally:
             doc.close()
-            
-            text = self._clean_text(text)
-            return text
-            
-        except Exception as e:
-            print(f"Fehler beim Extrahieren des Textes aus {pdf_path}: {e}")
-            return ""
     
-    def _extract_text_pdfplumber(self, pdf_path):
+    def _iter_pages_fitz_parallel(self, pdf_path, page_count, workers):
+        """Split the page range across worker processes, yield pages in order"""
+        workers = min(workers, page_count)
+        chunk_size = -(-page_count // workers)
+        ranges = [(start, min(start + chunk_size, page_count)) for start in range(0, page_count, chunk_size)]
+        print(f"📄 Lese {page_count} Seiten mit {len(ranges)} Prozessen: {os.path.basename(pdf_path)}")
+        
+        # Spawned like the pipeline pool, so it also works inside its workers
+        with ProcessPoolExecutor(max_workers=len(ranges),
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = [executor.submit(_read_fitz_pages, pdf_path, start, stop) for start, stop in ranges]
+            for future, (start, stop) in zip(futures, ranges):
+                try:
+                    pages = future.result()
+                except Exception as e:
+                    # E.g. a worker died; read this range in-process instead
+                    print(f"Seiten {start + 1}-{stop} werden ohne Worker gelesen: {e}")
+                    pages = _read_fitz_pages(pdf_path, start, stop)
+                yield from pages
+    
+    def _iter_pages_pdfplumber(self, pdf_path):
+        import pdfplumber
+        with pdfplumber.open(pdf_path) as pdf:
+            for page in pdf.pages:
+                yield page.extract_text() or ""
+    
+    def _join_page_texts(self, pdf_path):
+        """Text of all pages with whichever PDF library is available"""
         try:
-            import pdfplumber
-            text = ""
-            
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-            
-            text = self._clean_text(text)
-            return text
-            
+            return " ".join(self.iter_page_texts(pdf_path))
         except Exception as e:
             print(f"Fehler beim Extrahieren des Textes aus {pdf_path}: {e}")
             return ""
@@ -115,23 +294,120 @@ class PDFProcessor:
         return text
     
     def summarize_text(self, text, sentence_count=3):
+        return self.summarize_lengths(text, [sentence_count])[sentence_count]
+    
+    def summarize_lengths(self, text, sentence_counts):
+        """Summaries of several lengths from a single ranking: {count: summary}"""
         if not text or len(text.strip()) < 100:
-            return "Zu wenig Text für eine Zusammenfassung verfügbar."
+            message = "Zu wenig Text für eine Zusammenfassung verfügbar."
+            return {count: message for count in sentence_counts}
         
         try:
-            parser = PlaintextParser.from_string(text, Tokenizer("german"))
-            summary = self.summarizer(parser.document, sentence_count)
-            
-            summary_text = " ".join([str(sentence) for sentence in summary])
-            
-            if not summary_text.strip():
-                return "Zusammenfassung konnte nicht erstellt werden."
-            
-            return summary_text
-            
+            ranking = self.rank_sentences(text)
+            return {count: self.summary_from_ranking(ranking, count) for count in sentence_counts}
+        
         except Exception as e:
             print(f"Fehler bei der Zusammenfassung: {e}")
-            return f"Fehler bei der Zusammenfassung: {str(e)}"
+            message = f"Fehler bei der Zusammenfassung: {str(e)}"
+            return {count: message for count in sentence_counts}
+    
+    def rank_sentences(self, text):
+        """All sentences as (position, sentence) pairs, best LSA rating first"""
+        key = hashlib.sha1(text.encode('utf-8')).hexdigest()
+        with self._ranking_lock:
+            if key in self._ranking_cache:
+                self._ranking_cache.move_to_end(key)
+                return self._ranking_cache[key]
+        
+        parser = PlaintextParser.from_string(text, Tokenizer("german"))
+        sentences = parser.document.sentences
+        
+        if len(sentences) <= self.summary_max_sentences:
+            ranking = [(position, str(sentences[position])) for position in self._lsa_order(sentences)]
+        else:
+            ranking = self._rank_sentences_chunked(sentences)
+        
+        with self._ranking_lock:
+            self._ranking_cache[key] = ranking
+            while len(self._ranking_cache) > self._ranking_cache_size:
+                self._ranking_cache.popitem(last=False)
+        return ranking
+    
+    def _lsa_order(self, sentences):
+        """Positions of the given sentences, best LSA rating first"""
+        order = []
+        
+        def keep_all(infos):
+            # sumy hands over all sentences sorted by rating before cutting
+            order.extend(info.order for info in infos)
+            return infos
+        
+        document = ObjectDocumentModel([Paragraph(sentences)])
+        self.summarizer(document, keep_all)
+        return order
+    
+    def _rank_sentences_chunked(self, sentences):
+        """Rank a large document in two rounds: best sentences per chunk, then re-rank the winners"""
+        deadline = time.monotonic() + self.summary_time_budget
+        chunk_size = max(1, self.summary_chunk_sentences)
+        chunk_starts = range(0, len(sentences), chunk_size)
+        # Keep the re-ranking round within summary_max_sentences
+        winners_per_chunk = max(1, self.summary_max_sentences // len(chunk_starts))
+        
+        # Chunks are ranked in an evenly spread order, so a run stopped by the
+        # time budget still covers the whole document, just more coarsely
+        winners = []
+        for ranked, chunk_index in enumerate(self._spread_order(len(chunk_starts))):
+            if time.monotonic() > deadline:
+                print(f"⏱️ Zeitbudget für Zusammenfassung erreicht nach {ranked} von {len(chunk_starts)} Abschnitten")
+                break
+            start = chunk_starts[chunk_index]
+            chunk = sentences[start:start + chunk_size]
+            winners.extend(start + position for position in self._lsa_order(chunk)[:winners_per_chunk])
+        
+        winners.sort()
+        # With more chunks than summary_max_sentences every chunk still adds
+        # one winner; keep an evenly spaced selection across the document
+        max_winners = max(1, self.summary_max_sentences)
+        if len(winners) > max_winners:
+            winners = [winners[index * len(winners) // max_winners] for index in range(max_winners)]
+        
+        order = self._lsa_order([sentences[position] for position in winners])
+        return [(winners[index], str(sentences[winners[index]])) for index in order]
+    
+    def _spread_order(self, count):
+        """0..count-1 ordered by halving the stride: 0, n/2, n/4, 3n/4, ..."""
+        order = []
+        seen = set()
+        step = 1 << max(0, (count - 1).bit_length())
+        while step:
+            for index in range(0, count, step):
+                if index not in seen:
+                    seen.add(index)
+                    order.append(index)
+            step //= 2
+        return order
+    
+    def ranked_sentences(self, text, limit=20):
+        """The best `limit` entries of rank_sentences, empty if no ranking is possible"""
+        if not text or len(text.strip()) < 100:
+            return []
+        try:
+            return self.rank_sentences(text)[:limit]
+        except Exception as e:
+            print(f"Fehler bei der Satzbewertung: {e}")
+            return []
+    
+    @staticmethod
+    def summary_from_ranking(ranking, sentence_count):
+        """Best sentence_count sentences of a ranking, in document order"""
+        best = sorted(ranking[:sentence_count])
+        summary_text = " ".join(sentence for _, sentence in best)
+        
+        if not summary_text.strip():
+            return "Zusammenfassung konnte nicht erstellt werden."
+        
+        return summary_text
     
     def _get_german_stopwords(self):
         return {
@@ -0,0 +1,236 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+
+class PDFStore:
+    """Content-addressed PDF storage.
+    
+    Files are stored as <sha256>.pdf, so identical documents behind different
+    URLs are kept only once. An index maps each URL to its content hash plus
+    the ETag/Last-Modified validators of the last download. The total size is
+    capped; least recently used documents are evicted first.
+    """
+    
+    INDEX_FILENAME = 'pdf_index.json'
+    
+    def __init__(self, folder, max_bytes=2 * 1024 * 1024 * 1024):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(folder, self.INDEX_FILENAME)
+        
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        
+        self._lock = threading.Lock()
+        self._index = self._load_index()
+    
+    def path_for(self, content_hash):
+        return os.path.join(self.folder, f"{content_hash}.pdf")
+    
+    def lookup(self, url):
+        """Index entry for url if its document is present and intact, else None"""
+        with self._lock:
+            entry = self._index['urls'].get(url)
+            if not entry:
+                return None
+            
+            path = self.path_for(entry['sha256'])
+            if not os.path.exists(path) or os.path.getsize(path) != entry['size']:
+                # Missing or damaged file: forget it and download again
+                self._index['urls'].pop(url, None)
+                self._index['objects'].pop(entry['sha256'], None)
+                self._save_index()
+                return None
+            
+            return dict(entry, path=path)
+    
+    def touch(self, url):
+        """Mark the document behind url as recently used and return its path"""
+        with self._lock:
+            entry = self._index['urls'][url]
+            obj = self._index['objects'].setdefault(entry['sha256'], {'size': entry['size']})
+            obj['last_access'] = time.time()
+            self._save_index()
+            return self.path_for(entry['sha256'])
+    
+    def save(self, url, chunks, etag=None, last_modified=None, expected_size=None):
+        """Write the downloaded chunks atomically and register them under url"""
+        digest = hashlib.sha256()
+        size = 0
+        
+        fd, temp_path = tempfile.mkstemp(dir=self.folder, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    if chunk:
+                        f.write(chunk)
+                        digest.update(chunk)
+                        size += len(chunk)
+            
+            if expected_size is not None and size != expected_size:
+                raise IOError(f"Unvollständiger Download: {size} von {expected_size} Bytes")
+            
+            content_hash = digest.hexdigest()
+            path = self.path_for(content_hash)
+            
+            with self._lock:
+                if os.path.exists(path):
+                    # Same content already stored under another URL
+                    os.remove(temp_path)
+                else:
+                    os.replace(temp_path, path)
+                
+                self._index['urls'][url] = {
+                    'sha256': content_hash,
+                    'size': size,
+                    'etag': etag,
+                    'last_modified': last_modified
+                }
+                self._index['objects'][content_hash] = {'size': size, 'last_access': time.time()}
+                self._evict(keep=content_hash)
+                self._save_index()
+            
+            return path
+        
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    
+    def total_size(self):
+        with self._lock:
+            return sum(obj['size'] for obj in self._index['objects'].values())
+    
+    def _evict(self, keep=None):
+        objects = self._index['objects']
+        total = sum(obj['size'] for obj in objects.values())
+        if total <= self.max_bytes:
+            return
+        
+        for content_hash in sorted(objects, key=lambda h: objects[h]['last_access']):
+            if total <= self.max_bytes:
+                break
+            if content_hash == keep:
+                continue
+            
+            total -= objects.pop(content_hash)['size']
+            path = self.path_for(content_hash)
+            if os.path.exists(path):
+                os.remove(path)
+            
+            for url in [u for u, e in self._index['urls'].items() if e['sha256'] == content_hash]:
+                del self._index['urls'][url]
+            
+            print(f"🧹 PDF entfernt (Speicherlimit): {content_hash[:12]}")
+    
+    def _load_index(self):
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+                index.setdefault('urls', {})
+                index.setdefault('objects', {})
+                return index
+            except (OSError, ValueError) as e:
+                print(f"PDF-Index konnte nicht gelesen werden, starte neu: {e}")
+        return {'urls': {}, 'objects': {}}
+    
+    def _save_index(self):
+        fd, temp_path = tempfile.mkstemp(dir=self.folder, suffix='.json.part')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f)
+        os.replace(temp_path, self.index_path)
+
+
+class TextCache:
+    """Compressed on-disk cache for extracted PDF text.
+    
+    Entries are keyed by the PDF content hash plus extractor name and version,
+    so a changed document or a different extraction library never reuses
+    stale text. Entries are only read when requested; the least recently used
+    ones are removed once the cache exceeds max_bytes.
+    """
+    
+    def __init__(self, folder, max_bytes=200 * 1024 * 1024):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        
+        self._lock = threading.Lock()
+    
+    def path_for(self, content_hash, extractor, version):
+        safe_version = re.sub(r'[^A-Za-z0-9.+-]', '_', str(version))
+        return os.path.join(self.folder, f"{content_hash}-{extractor}-{safe_version}.txt.gz")
+    
+    def get(self, content_hash, extractor, version):
+        path = self.path_for(content_hash, extractor, version)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                text = f.read()
+        except (OSError, EOFError):
+            return None
+        
+        # The modification time doubles as last access for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return text
+    
+    def set(self, content_hash, extractor, version, text):
+        path = self.path_for(content_hash, extractor, version)
+        fd, temp_path = tempfile.mkstemp(dir=self.folder, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as raw:
+                with gzip.GzipFile(fileobj=raw, mode='wb') as f:
+                    f.write(text.encode('utf-8'))
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        
+        with self._lock:
+            self._evict(keep=path)
+    
+    def total_size(self):
+        return sum(size for mtime, size, path in self._entries())
+    
+    def _entries(self):
+        # Other worker processes evict from the same folder, so files may
+        # vanish between listing and stat
+        entries = []
+        for entry in os.scandir(self.folder):
+            if not entry.name.endswith('.txt.gz'):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+    
+    def _evict(self, keep=None):
+        entries = self._entries()
+        total = sum(size for mtime, size, path in entries)
+        if total <= self.max_bytes:
+            return
+        
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+            total -= size
@@ -0,0 +1,254 @@
+import os
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from pdf_processor import PDFProcessor
+from pdf_store import TextCache
+
+# PDFProcessor of the current worker process (set by _init_worker)
+_worker_processor = None
+
+# Summary lengths shown in the overview and on the detail page
+SHORT_SUMMARY_SENTENCES = 2
+DETAILED_SUMMARY_SENTENCES = 5
+# Ranked sentences kept per meeting for other summary lengths on the detail page
+MAX_RANKED_SENTENCES = 20
+# Fields of a successful analyze_pdf() result
+RESULT_FIELDS = ('summary', 'detailed_summary', 'ranked_sentences', 'full_text')
+
+
+class CPUBudget:
+    """Number of CPUs in use, shared by all processes of one pool.
+    
+    Every pool process claims one CPU while it analyzes a document; a large
+    PDF may additionally take the CPUs that are idle right now for its page
+    workers. So one big council package gets the cores that the other pool
+    processes leave unused, while a busy pool reads pages sequentially and
+    the total never exceeds cpu_count.
+    """
+    
+    def __init__(self, in_use, cpu_count):
+        # in_use is a multiprocessing.Value('i') from the pool's context
+        self.in_use = in_use
+        self.cpu_count = cpu_count
+    
+    def claim(self, count=1):
+        """Claim count CPUs regardless of availability (one per busy pool process)"""
+        with self.in_use.get_lock():
+            self.in_use.value += count
+    
+    def reserve(self, wanted):
+        """Claim up to wanted idle CPUs; returns the number actually claimed"""
+        with self.in_use.get_lock():
+            granted = max(0, min(wanted, self.cpu_count - self.in_use.value))
+            self.in_use.value += granted
+            return granted
+    
+    def release(self, count=1):
+        with self.in_use.get_lock():
+            self.in_use.value -= count
+
+
+def _init_worker(text_cache_folder, page_workers, parallel_page_threshold, cpus_in_use=None, cpu_count=1):
+    global _worker_processor
+    text_cache = TextCache(text_cache_folder) if text_cache_folder else None
+    cpu_budget = CPUBudget(cpus_in_use, cpu_count) if cpus_in_use is not None else None
+    _worker_processor = PDFProcessor(text_cache=text_cache, page_workers=page_workers,
+                                     parallel_page_threshold=parallel_page_threshold,
+                                     cpu_budget=cpu_budget)
+
+
+def _analyze_in_worker(pdf_path):
+    cpu_budget = _worker_processor.cpu_budget
+    if cpu_budget is None:
+        return analyze_pdf(_worker_processor, pdf_path)
+    
+    cpu_budget.claim()
+    try:
+        return analyze_pdf(_worker_processor, pdf_path)
+    finally:
+        cpu_budget.release()
+
+
+def analyze_pdf(pdf_processor, pdf_path):
+    """Extract and summarize a downloaded PDF"""
+    full_text = pdf_processor.extract_text(pdf_path)
+    
+    # One sentence ranking serves both summary lengths
+    summaries = pdf_processor.summarize_lengths(
+        full_text, [SHORT_SUMMARY_SENTENCES, DETAILED_SUMMARY_SENTENCES]
+    )
+    
+    return {
+        # Short summary for overview
+        'summary': summaries[SHORT_SUMMARY_SENTENCES],
+        # Detailed summary for detail page
+        'detailed_summary': summaries[DETAILED_SUMMARY_SENTENCES],
+        'ranked_sentences': pdf_processor.ranked_sentences(full_text, limit=MAX_RANKED_SENTENCES),
+        'full_text': full_text[:2000] + "..." if len(full_text) > 2000 else full_text
+    }
+
+
+def create_process_pool(workers, text_cache_folder=None, page_workers=0, parallel_page_threshold=200):
+    """Process pool for text extraction and summarization.
+    
+    Uses the spawn start method so worker start-up is the same on Windows
+    and Linux and never forks a threaded Flask process. Large PDFs are read
+    with up to page_workers processes, limited by a CPUBudget shared by the
+    pool: page workers only use CPUs no other pool process is busy on.
+    """
+    context = multiprocessing.get_context('spawn')
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(text_cache_folder, page_workers, parallel_page_threshold,
+                  context.Value('i', 0), os.cpu_count() or 1)
+    )
+
+
+class MeetingPipeline:
+    """Downloads, extracts and summarizes the PDFs of a list of meetings.
+    
+    Downloads run in an I/O thread pool. Extraction and summarization run in
+    process_executor if one is given, otherwise in the download thread.
+    At most max_pending documents wait for the CPU stage; further downloads
+    block until a slot frees up. A failing meeting yields an 'error' result
+    and does not affect the others. Closing the iter_results() generator
+    early (e.g. a cancelled job) skips all meetings not yet started.
+    
+    If a worker process dies, the meetings in flight fail and
+    on_broken_pool(executor) is asked for a replacement executor for the
+    remaining ones (None processes them in the download threads).
+    """
+    
+    def __init__(self, pdf_processor, download_folder, io_workers=4, process_executor=None, max_pending=8,
+                 on_broken_pool=None):
+        self.pdf_processor = pdf_processor
+        self.download_folder = download_folder
+        self.io_workers = io_workers
+        self.process_executor = process_executor
+        self.max_pending = max_pending
+        self.on_broken_pool = on_broken_pool
+        # Seconds between liveness checks while waiting for results
+        self.poll_interval = 1.0
+        
+        self._pool_lock = threading.Lock()
+    
+    def run(self, meetings):
+        """Results in meeting order; None for meetings without PDF"""
+        results = [None] * len(meetings)
+        for index, result in self.iter_results(meetings):
+            results[index] = result
+        return results
+    
+    def iter_results(self, meetings):
+        """Yield (index, result) pairs as soon as each meeting is processed"""
+        jobs = [(index, meeting['pdf_url']) for index, meeting in enumerate(meetings) if meeting.get('pdf_url')]
+        if not jobs:
+            return
+        
+        done = queue.Queue()
+        pending = threading.BoundedSemaphore(max(1, self.max_pending))
+        stopped = threading.Event()
+        
+        cpu_futures = []
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(self.io_workers, len(jobs)))) as io_executor:
+            io_futures = [
+                io_executor.submit(self._process_meeting, index, pdf_url, done, pending, stopped, cpu_futures)
+                for index, pdf_url in jobs
+            ]
+            
+            remaining = {index for index, pdf_url in jobs}
+            idle_polls = 0
+            try:
+                while remaining:
+                    try:
+                        index, result = done.get(timeout=self.poll_interval)
+                    except queue.Empty:
+                        # Every stage has finished but results are missing: a
+                        # bug or a lost callback, which must not hang the caller
+                        if all(f.done() for f in io_futures) and all(f.done() for f in list(cpu_futures)):
+                            idle_polls += 1
+                            if idle_polls >= 2:
+                                for index in sorted(remaining):
+                                    yield index, {'error': "PDF-Verarbeitung ohne Ergebnis abgebrochen"}
+                                return
+                        continue
+                    
+                    idle_polls = 0
+                    remaining.discard(index)
+                    yield index, result
+            finally:
+                stopped.set()
+    
+    def _process_meeting(self, index, pdf_url, done, pending, stopped, cpu_futures):
+        if stopped.is_set():
+            return
+        
+        try:
+            pdf_path = self.pdf_processor.download_pdf(pdf_url, self.download_folder)
+        except Exception as e:
+            done.put((index, {'error': str(e)}))
+            return
+        
+        if pdf_path is None:
+            done.put((index, {'error': "PDF konnte nicht heruntergeladen werden"}))
+            return
+        
+        executor = self.process_executor
+        if executor is None:
+            try:
+                result = analyze_pdf(self.pdf_processor, pdf_path)
+            except Exception as e:
+                result = {'error': str(e)}
+            done.put((index, result))
+            return
+        
+        # Backpressure: wait for a free slot in the CPU stage
+        while not pending.acquire(timeout=0.5):
+            if stopped.is_set():
+                return
+        
+        if stopped.is_set():
+            pending.release()
+            return
+        
+        try:
+            future = executor.submit(_analyze_in_worker, pdf_path)
+        except Exception as e:
+            pending.release()
+            done.put((index, {'error': str(e)}))
+            if isinstance(e, BrokenProcessPool):
+                self._replace_broken_pool(executor)
+            return
+        
+        def finished(future):
+            pending.release()
+            result = {'error': "PDF-Verarbeitung abgestürzt"}
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'error': str(e) or "PDF-Verarbeitung abgestürzt"}
+                if isinstance(e, BrokenProcessPool):
+                    self._replace_broken_pool(executor)
+            finally:
+                done.put((index, result))
+        
+        cpu_futures.append(future)
+        future.add_done_callback(finished)
+    
+    def _replace_broken_pool(self, executor):
+        with self._pool_lock:
+            if self.process_executor is not executor:
+                return
+            try:
+                self.process_executor = self.on_broken_pool(executor) if self.on_broken_pool else None
+            except Exception as e:
+                # Without a replacement the remaining meetings run in the download threads
+                print(f"Neuer Prozess-Pool konnte nicht gestartet werden: {e}")
+                self.process_executor = None
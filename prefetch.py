@@ -0,0 +1,72 @@
+import threading
+import uuid
+
+from jobs import Job, JobCancelled
+
+
+class _IdleJob(Job):
+    """Job that counts as cancelled as soon as the app is no longer idle"""
+    
+    def __init__(self, is_idle):
+        super().__init__(uuid.uuid4().hex, 'prefetch')
+        self.is_idle = is_idle
+    
+    def check_cancelled(self):
+        super().check_cancelled()
+        if not self.is_idle():
+            raise JobCancelled()
+
+
+class PrefetchScheduler:
+    """Runs prefetch work periodically in a daemon thread while the app is idle.
+    
+    Every interval seconds the scheduler waits until is_idle() is true and
+    then calls prefetch(job=job). The job stops at its next
+    check_cancelled() once the app becomes busy, so interactive requests
+    keep the full capacity. Finished work is cached, so the next run
+    continues where the previous one stopped.
+    """
+    
+    def __init__(self, prefetch, interval=3600, is_idle=None, idle_poll=10):
+        self.prefetch = prefetch
+        self.interval = interval
+        self.is_idle = is_idle or (lambda: True)
+        self.idle_poll = idle_poll
+        
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        if self._thread is not None:
+            return
+        
+        self._thread = threading.Thread(target=self._loop, name='prefetch', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+    
+    def run_once(self):
+        """One prefetch run; returns the final job status"""
+        job = _IdleJob(self.is_idle)
+        job.set_status('running')
+        try:
+            self.prefetch(job=job)
+            job.set_status('done')
+        except JobCancelled:
+            print("⏸️ Vorabladen unterbrochen, die App wird gerade benutzt")
+            job.set_status('cancelled')
+        except Exception as e:
+            print(f"Fehler beim Vorabladen: {e}")
+            job.set_status('failed', error=str(e))
+        return job.status
+    
+    def _loop(self):
+        while not self._stop.is_set():
+            while not self.is_idle():
+                if self._stop.wait(self.idle_poll):
+                    return
+            
+            status = self.run_once()
+            # Retry soon after an interruption, otherwise wait for the next round
+            self._stop.wait(self.idle_poll if status == 'cancelled' else self.interval)
@@ -1,14 +1,77 @@
 import requests
 from bs4 import BeautifulSoup
+from http_cache import CachedSession
 from datetime import datetime, timedelta
 import re
-from urllib.parse import urljoin, urlparse
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urljoin, urlparse, parse_qs
+
+
+class ScrapeError(Exception):
+    """Listings could not be fetched; unlike an empty result, nothing is known"""
+
+
+def meeting_id(meeting):
+    """Stable ID of a meeting, the same in every scrape.
+    
+    Uses the upstream session token from the detail URL (/tops/?__=<token>)
+    or a numeric session parameter if there is one, otherwise a hash of
+    date, time and committee.
+    """
+    query = parse_qs(urlparse(meeting.get('detail_url') or '').query)
+    token = query.get('__', [''])[0]
+    if token:
+        # The ID is used in /meeting/<id> URLs, so other characters are hashed away
+        if not re.fullmatch(r'[\w-]+', token):
+            token = hashlib.sha1(token.encode('utf-8')).hexdigest()[:16]
+        return f"sitzung-{token}"
+    for key in ('id', 'sitzung', 'ksinr', '__ksinr'):
+        if query.get(key, [''])[0].isdigit():
+            return f"sitzung-{query[key][0]}"
+    
+    key = '|'.join(meeting.get(field, '') or '' for field in ('date', 'time', 'committee'))
+    return f"termin-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}"
+
+
+class HostLimiter:
+    """Politeness limits per host: concurrent requests and minimum spacing"""
+    
+    def __init__(self, max_per_host=4, min_interval=0.0):
+        self.max_per_host = max_per_host
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._next_slot = {}
+    
+    @contextmanager
+    def slot(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            semaphore = self._semaphores.setdefault(host, threading.BoundedSemaphore(self.max_per_host))
+        
+        with semaphore:
+            if self.min_interval > 0:
+                # Reserve the next free start time for this host
+                with self._lock:
+                    now = time.monotonic()
+                    start = max(now, self._next_slot.get(host, now))
+                    self._next_slot[host] = start + self.min_interval
+                if start > now:
+                    time.sleep(start - now)
+            yield
+
 
 class RatsInfoScraper:
-    def __init__(self):
+    def __init__(self, max_workers=6, range_chunk_months=12, csrf_ttl=900,
+                 detail_workers=8, max_per_host=4, request_delay=0.0, request_timeout=15,
+                 http_cache=None, cache_ttl_current=3600, cache_ttl_past=30 * 24 * 3600):
         self.base_url = "https://luenen.ratsinfomanagement.net"
         self.termine_url = "https://luenen.ratsinfomanagement.net/termine/"
-        self.session = requests.Session()
+        self.session = CachedSession(http_cache, default_ttl=cache_ttl_current)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
@@ -19,19 +82,65 @@ class RatsInfoScraper:
             "Betriebsausschuss Zentrale Gebäudebewirtschaftung Lünen",
             "Ausschuss für Arbeitsmarkt, Wirtschaftsförderung und Innovation"
         ]
+        
+        # Upper bound for concurrent month requests (1 = sequential)
+        self.max_workers = max_workers
+        # Months per ranged JSON request (1 = one request per month)
+        self.range_chunk_months = range_chunk_months
+        
+        # CSRF token is shared by all JSON requests until it expires
+        self.csrf_ttl = csrf_ttl
+        self._csrf_token = None
+        self._csrf_fetched_at = None
+        self._csrf_lock = threading.Lock()
+        
+        # Detail page (PDF link) resolution runs as its own concurrent stage
+        self.detail_workers = detail_workers
+        self.request_timeout = request_timeout
+        self.host_limiter = HostLimiter(max_per_host, request_delay)
+        
+        # Cache lifetimes: past months never change, the current one does
+        self.cache_ttl_current = cache_ttl_current
+        self.cache_ttl_past = cache_ttl_past
     
-    def scrape_meetings(self, start_date, end_date):
+    def scrape_meetings(self, start_date, end_date, committees=None, progress=None, resolve_pdfs=True,
+                        raise_on_error=False, cache=True):
+        """Scrape all meetings between start_date and end_date.
+        
+        committees may be a collection of committee names or a predicate
+        taking the committee name; non-matching meetings are dropped before
+        any detail page is fetched.
+        
+        progress, if given, is called as progress(months_done, months_total)
+        whenever month listings arrive. An exception raised by it aborts the
+        scrape.
+        
+        With resolve_pdfs=False only the listings are returned; call
+        resolve_pdf_urls() later to fetch the detail pages.
+        
+        Months whose listing could not be fetched are skipped, or with
+        raise_on_error=True reported by raising ScrapeError.
+        
+        cache=False requests the listings from the server instead of the HTTP
+        cache, for callers that keep their own copy and decide when it is stale.
+        """
         meetings = []
-        current_date = start_date
+        committee_matches = self._committee_filter(committees)
         
-        while current_date <= end_date:
-            monthly_meetings = self._scrape_month(current_date.year, current_date.month)
+        months = self._month_range(start_date, end_date)
+        failed = 0
+        for monthly_meetings in self._scrape_months(months, progress, cache=cache):
+            if monthly_meetings is None:
+                failed += 1
+                continue
             for meeting in monthly_meetings:
                 meeting_date = self._parse_meeting_date(meeting['date'])
                 print(f"Checking meeting: {meeting['title']} on {meeting['date']} (parsed: {meeting_date}) against range {start_date.date()} to {end_date.date()}")
-                if start_date.date() <= meeting_date.date() <= end_date.date():
-                    # Temporarily add all meetings to see what we're getting
-                    meeting['pdf_url'] = self._get_pdf_url(meeting['detail_url'])
+                if not start_date.date() <= meeting_date.date() <= end_date.date():
+                    print(f"❌ Filtered out (date): {meeting_date.date()} not in range")
+                elif not committee_matches(meeting.get('committee', '')):
+                    print(f"❌ Filtered out (committee): {meeting.get('committee', 'N/A')}")
+                else:
                     meetings.append(meeting)
                     
                     # Check if it would be relevant
@@ -39,13 +148,9 @@ class RatsInfoScraper:
                         print(f"✅ Added RELEVANT meeting: {meeting['title']}")
                     else:
                         print(f"📋 Added meeting (not in standard list): {meeting['committee']}")
-                else:
-                    print(f"❌ Filtered out (date): {meeting_date.date()} not in range")
-            
-            if current_date.month == 12:
-                current_date = current_date.replace(year=current_date.year + 1, month=1)
-            else:
-                current_date = current_date.replace(month=current_date.month + 1)
+        
+        if failed and raise_on_error:
+            raise ScrapeError(f"{failed} von {len(months)} Monaten konnten nicht geladen werden")
         
         # Remove duplicates based on date, time, and committee
         unique_meetings = []
@@ -59,115 +164,289 @@ class RatsInfoScraper:
             else:
                 print(f"🔄 Removed duplicate: {meeting.get('title', 'N/A')} on {meeting.get('date', 'N/A')}")
         
+        # Only the meetings that survived filtering need their detail page
+        if resolve_pdfs:
+            self.resolve_pdf_urls(unique_meetings)
+        
         print(f"📊 Found {len(meetings)} total, {len(unique_meetings)} unique meetings")
         return unique_meetings
     
-    def _scrape_month(self, year, month):
+    def _committee_filter(self, committees):
+        """Turn a committee selection into a predicate on the committee name"""
+        if not committees:
+            return lambda committee: True
+        if callable(committees):
+            return committees
+        selected = set(committees)
+        return lambda committee: committee in selected
+    
+    def _month_range(self, start_date, end_date):
+        """List of (year, month) tuples covering the date range"""
+        months = []
+        year, month = start_date.year, start_date.month
+        
+        while (year, month) <= (end_date.year, end_date.month):
+            months.append((year, month))
+            if month == 12:
+                year, month = year + 1, 1
+            else:
+                month += 1
+        
+        return months
+    
+    def resolve_pdf_urls(self, meetings):
+        """Set 'pdf_url' on every meeting by fetching the detail pages concurrently"""
+        pdf_urls = self._map_concurrent(self._resolve_pdf_url, meetings, max_workers=self.detail_workers)
+        for meeting, pdf_url in zip(meetings, pdf_urls):
+            meeting['pdf_url'] = pdf_url
+        return meetings
+    
+    def _resolve_pdf_url(self, meeting):
+        detail_url = meeting.get('detail_url')
+        if not detail_url:
+            return None
+        
+        meeting_date = self._parse_meeting_date(meeting.get('date'))
+        with self.host_limiter.slot(detail_url):
+            return self._get_pdf_url(detail_url, cache_ttl=self._cache_ttl(meeting_date))
+    
+    def _cache_ttl(self, end_date):
+        """Cache lifetime for data ending at end_date"""
+        today = datetime.now()
+        if (end_date.year, end_date.month) < (today.year, today.month):
+            return self.cache_ttl_past
+        return self.cache_ttl_current
+    
+    def _map_concurrent(self, func, items, max_workers=None):
+        """Apply func to all items with bounded concurrency, preserving order"""
+        items = list(items)
+        max_workers = self.max_workers if max_workers is None else max_workers
+        if max_workers <= 1 or len(items) <= 1:
+            return [func(item) for item in items]
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+            return list(executor.map(func, items))
+    
+    def _scrape_months(self, months, progress=None, cache=True):
+        """Fetch the listings for all months, one result list per block in calendar order.
+        
+        Months are requested in blocks of range_chunk_months with one JSON call
+        each; blocks whose ranged request fails are scraped month by month.
+        """
+        chunk_size = max(1, self.range_chunk_months)
+        chunks = [months[i:i + chunk_size] for i in range(0, len(months), chunk_size)]
+        
+        months_done = [0]
+        progress_lock = threading.Lock()
+        
+        def report(count):
+            if progress is None or not count:
+                return
+            with progress_lock:
+                months_done[0] += count
+                progress(months_done[0], len(months))
+        
+        def scrape_range(chunk):
+            chunk_meetings = self._scrape_range_json(chunk, cache=cache)
+            report(len(chunk) if chunk_meetings is not None else 0)
+            return chunk_meetings
+        
+        def scrape_month(year_month):
+            monthly_meetings = self._scrape_month_tuple(year_month, cache=cache)
+            report(1)
+            return monthly_meetings
+        
+        # Single-month blocks go straight to the per-month path
+        ranged_chunks = [chunk for chunk in chunks if len(chunk) > 1]
+        ranged_results = dict(zip(
+            map(tuple, ranged_chunks),
+            self._map_concurrent(scrape_range, ranged_chunks)
+        ))
+        
+        fallback_months = [
+            month for chunk in chunks
+            if ranged_results.get(tuple(chunk)) is None
+            for month in chunk
+        ]
+        monthly_results = dict(zip(
+            fallback_months,
+            self._map_concurrent(scrape_month, fallback_months)
+        ))
+        
+        results = []
+        for chunk in chunks:
+            chunk_meetings = ranged_results.get(tuple(chunk))
+            if chunk_meetings is not None:
+                results.append(chunk_meetings)
+            else:
+                results.extend(monthly_results[month] for month in chunk)
+        
+        return results
+    
+    def _scrape_month_tuple(self, year_month, cache=True):
+        year, month = year_month
+        return self._scrape_month(year, month, cache=cache)
+    
+    def _scrape_month(self, year, month, cache=True):
+        """Listings of one month; None if neither the JSON API nor the HTML pages could be fetched"""
         # First try the JSON API endpoint
-        meetings = self._scrape_month_json(year, month)
+        meetings = self._scrape_month_json(year, month, cache=cache)
         if meetings:
             return meetings
         
         # Fallback to HTML scraping
-        return self._scrape_month_html(year, month)
+        html_meetings = self._scrape_month_html(year, month, cache=cache)
+        if html_meetings is None and meetings is None:
+            return None
+        return html_meetings or []
     
-    def _scrape_month_json(self, year, month):
-        """Scrape using the JSON API endpoint"""
+    def _scrape_month_json(self, year, month, cache=True):
+        """Scrape using the JSON API endpoint; None if the request failed"""
         try:
-            # Get CSRF token first
-            csrf_token = self._get_csrf_token()
-            
-            # Calculate date range for the month
-            from datetime import datetime, timedelta
-            start_date = datetime(year, month, 1)
-            if month == 12:
-                end_date = datetime(year + 1, 1, 1) - timedelta(days=1)
-            else:
-                end_date = datetime(year, month + 1, 1) - timedelta(days=1)
-            
-            # JSON API endpoint
-            json_url = "https://luenen.ratsinfomanagement.net/termine/json/Sitzungstermine/"
-            
-            headers = {
-                'X-Requested-With': 'XMLHttpRequest',
-                'Content-Type': 'application/x-www-form-urlencoded',
-            }
-            
-            if csrf_token:
-                headers['X-CSRF-Token'] = csrf_token
-            
-            data = {
-                'start': start_date.strftime('%Y-%m-%d'),
-                'end': end_date.strftime('%Y-%m-%d')
-            }
-            
+            start_date, end_date = self._month_bounds(year, month)
             print(f"Requesting JSON data for {month}/{year} from {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
-            
-            response = self.session.post(json_url, data=data, headers=headers, timeout=15)
-            response.raise_for_status()
-            
-            json_data = response.json()
-            print(f"JSON response keys: {json_data.keys() if isinstance(json_data, dict) else 'Not a dict'}")
-            
-            meetings = []
-            
-            # Parse events from JSON response
-            if isinstance(json_data, list):
-                events = json_data
-            elif isinstance(json_data, dict) and 'events' in json_data:
-                events = json_data['events']
-            elif isinstance(json_data, dict) and len(json_data) > 0:
-                # Try to find events in any key
-                events = []
-                for key, value in json_data.items():
-                    if isinstance(value, list) and len(value) > 0:
-                        events = value
-                        break
-            else:
-                events = []
-            
-            print(f"Found {len(events)} events in JSON response")
-            
-            for event in events:
-                meeting = self._parse_json_event(event)
-                if meeting:
-                    # Add all meetings for now, filter later
-                    print(f"📋 Found meeting: {meeting.get('committee', 'N/A')} on {meeting.get('date', 'N/A')}")
-                    meetings.append(meeting)
-            
-            return meetings
-            
+            return self._fetch_json_meetings(start_date, end_date, cache=cache)
+        
         except Exception as e:
             print(f"JSON API fehler: {e}")
-            return []
+            return None
     
-    def _get_csrf_token(self):
-        """Extract CSRF token from the main page"""
+    def _scrape_range_json(self, months, cache=True):
+        """Request a whole block of months with a single JSON call.
+        
+        Returns None if the request fails or yields nothing, so the caller
+        can fall back to per-month scraping.
+        """
         try:
-            response = self.session.get(self.termine_url, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Look for CSRF token in meta tags
-            csrf_meta = soup.find('meta', {'name': 'csrf-token'})
-            if csrf_meta:
-                return csrf_meta.get('content')
-            
-            # Look for CSRF token in script tags
-            scripts = soup.find_all('script')
-            for script in scripts:
-                if script.string and 'csrf' in script.string.lower():
-                    import re
-                    token_match = re.search(r"'X-CSRF-Token':\s*'([^']+)'", script.string)
-                    if token_match:
-                        return token_match.group(1)
-            
-            return None
-            
+            start_date = self._month_bounds(*months[0])[0]
+            end_date = self._month_bounds(*months[-1])[1]
+            print(f"Requesting JSON data for range {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
+            meetings = self._fetch_json_meetings(start_date, end_date, cache=cache)
+            return meetings or None
+        
         except Exception as e:
-            print(f"CSRF token extraction fehler: {e}")
+            print(f"JSON API fehler (Zeitraum): {e}")
             return None
     
+    def _fetch_json_meetings(self, start_date, end_date, cache=True):
+        """POST a date window to the Sitzungstermine endpoint and parse the events"""
+        # Get CSRF token first
+        csrf_token = self._get_csrf_token()
+        
+        # JSON API endpoint
+        json_url = "https://luenen.ratsinfomanagement.net/termine/json/Sitzungstermine/"
+        
+        headers = {
+            'X-Requested-With': 'XMLHttpRequest',
+            'Content-Type': 'application/x-www-form-urlencoded',
+        }
+        
+        if csrf_token:
+            headers['X-CSRF-Token'] = csrf_token
+        
+        data = {
+            'start': start_date.strftime('%Y-%m-%d'),
+            'end': end_date.strftime('%Y-%m-%d')
+        }
+        
+        cache_ttl = self._cache_ttl(end_date)
+        response = self.session.post(json_url, data=data, headers=headers, timeout=15, cache=cache,
+                                     cache_ttl=cache_ttl)
+        
+        # A rejected token is most likely stale: refresh it and retry once
+        if response.status_code in (403, 419):
+            print(f"JSON API lehnt CSRF-Token ab ({response.status_code}), hole neues Token")
+            csrf_token = self._get_csrf_token(force_refresh=True)
+            if csrf_token:
+                headers['X-CSRF-Token'] = csrf_token
+            else:
+                headers.pop('X-CSRF-Token', None)
+            response = self.session.post(json_url, data=data, headers=headers, timeout=15, cache=cache,
+                                         cache_ttl=cache_ttl)
+        
+        response.raise_for_status()
+        
+        json_data = response.json()
+        print(f"JSON response keys: {json_data.keys() if isinstance(json_data, dict) else 'Not a dict'}")
+        
+        meetings = []
+        
+        # Parse events from JSON response
+        if isinstance(json_data, list):
+            events = json_data
+        elif isinstance(json_data, dict) and 'events' in json_data:
+            events = json_data['events']
+        elif isinstance(json_data, dict) and len(json_data) > 0:
+            # Try to find events in any key
+            events = []
+            for key, value in json_data.items():
+                if isinstance(value, list) and len(value) > 0:
+                    events = value
+                    break
+        else:
+            events = []
+        
+        print(f"Found {len(events)} events in JSON response")
+        
+        for event in events:
+            meeting = self._parse_json_event(event)
+            if meeting:
+                # Add all meetings for now, filter later
+                print(f"📋 Found meeting: {meeting.get('committee', 'N/A')} on {meeting.get('date', 'N/A')}")
+                meetings.append(meeting)
+        
+        return meetings
+    
+    def _month_bounds(self, year, month):
+        """First and last day of a calendar month"""
+        start_date = datetime(year, month, 1)
+        if month == 12:
+            end_date = datetime(year + 1, 1, 1) - timedelta(days=1)
+        else:
+            end_date = datetime(year, month + 1, 1) - timedelta(days=1)
+        return start_date, end_date
+    
+    def _get_csrf_token(self, force_refresh=False):
+        """Return the CSRF token, fetching it only when the cached one expired"""
+        with self._csrf_lock:
+            now = time.monotonic()
+            if (not force_refresh and self._csrf_fetched_at is not None
+                    and now - self._csrf_fetched_at < self.csrf_ttl):
+                return self._csrf_token
+            
+            try:
+                token = self._fetch_csrf_token()
+            except Exception as e:
+                # Do not cache failures, the next call tries again
+                print(f"CSRF token extraction fehler: {e}")
+                return None
+            
+            self._csrf_token = token
+            self._csrf_fetched_at = time.monotonic()
+            return token
+    
+    def _fetch_csrf_token(self):
+        """Extract CSRF token from the main page"""
+        # The token must be fresh, never serve this page from the HTTP cache
+        response = self.session.get(self.termine_url, timeout=10, cache=False)
+        response.raise_for_status()
+        soup = BeautifulSoup(response.content, 'html.parser')
+        
+        # Look for CSRF token in meta tags
+        csrf_meta = soup.find('meta', {'name': 'csrf-token'})
+        if csrf_meta:
+            return csrf_meta.get('content')
+        
+        # Look for CSRF token in script tags
+        scripts = soup.find_all('script')
+        for script in scripts:
+            if script.string and 'csrf' in script.string.lower():
+                token_match = re.search(r"'X-CSRF-Token':\s*'([^']+)'", script.string)
+                if token_match:
+                    return token_match.group(1)
+        
+        return None
+    
     def _parse_json_event(self, event):
         """Parse a single event from JSON data"""
         try:
@@ -218,23 +497,26 @@ class RatsInfoScraper:
             
             print(f"Parsed JSON event: {title} on {date_str}")
             return meeting
-            
+        
         except Exception as e:
             print(f"Fehler beim Parsen eines JSON-Events: {e}")
             return None
     
-    def _scrape_month_html(self, year, month):
-        """Fallback HTML scraping method"""
+    def _scrape_month_html(self, year, month, cache=True):
+        """Fallback HTML scraping method; None if no page could be fetched"""
         urls_to_try = [
             f"{self.termine_url}?year={year}&month={month:02d}",
             f"https://luenen.ratsinfomanagement.net/termine/kalender/{year}/{month:02d}",
             f"https://luenen.ratsinfomanagement.net/termine/liste?von={year}-{month:02d}-01&bis={year}-{month:02d}-31"
         ]
         
+        cache_ttl = self._cache_ttl(self._month_bounds(year, month)[1])
+        fetched = False
         for url in urls_to_try:
             try:
-                response = self.session.get(url, timeout=10)
+                response = self.session.get(url, timeout=10, cache=cache, cache_ttl=cache_ttl)
                 response.raise_for_status()
+                fetched = True
                 soup = BeautifulSoup(response.content, 'html.parser')
                 
                 meetings = []
@@ -260,11 +542,13 @@ class RatsInfoScraper:
                 
                 if meetings:
                     return meetings
-                    
+            
             except requests.RequestException as e:
                 print(f"Fehler beim HTML-Scraping von {url}: {e}")
                 continue
         
+        if not fetched:
+            return None
         print(f"Keine Termine gefunden für {month}/{year}")
         return []
     
@@ -295,7 +579,7 @@ class RatsInfoScraper:
                 'location': location_cell,
                 'detail_url': detail_url
             }
-            
+        
         except Exception as e:
             print(f"Fehler beim Parsen einer Sitzungszeile: {e}")
             return None
@@ -342,7 +626,7 @@ class RatsInfoScraper:
                         'location': '',
                         'detail_url': detail_url if 'detail_url' in locals() else ''
                     }
-                    
+        
         except Exception as e:
             print(f"Fehler beim Parsen eines Meeting-Elements: {e}")
         
@@ -370,7 +654,7 @@ class RatsInfoScraper:
                     'location': '',
                     'detail_url': urljoin(self.base_url, href)
                 }
-                
+        
         except Exception as e:
             print(f"Fehler beim Parsen eines Links: {e}")
         
@@ -417,12 +701,12 @@ class RatsInfoScraper:
         
         return False
     
-    def _get_pdf_url(self, detail_url):
+    def _get_pdf_url(self, detail_url, cache_ttl=None):
         if not detail_url:
             return None
-            
+        
         try:
-            response = self.session.get(detail_url)
+            response = self.session.get(detail_url, timeout=self.request_timeout, cache_ttl=cache_ttl)
             response.raise_for_status()
             soup = BeautifulSoup(response.content, 'html.parser')
             
@@ -450,7 +734,7 @@ class RatsInfoScraper:
                 href = pdf_links[0].get('href', '')
                 print(f"📄 Found generic PDF: {pdf_links[0].get_text()}")
                 return urljoin(self.base_url, href)
-                
+        
         except Exception as e:
             print(f"Fehler beim Abrufen der PDF-URL von {detail_url}: {e}")
         
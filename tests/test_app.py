@@ -5,6 +5,8 @@ import tempfile
 import shutil
 from unittest.mock import patch, MagicMock
 from app import app
+from meeting_cache import MemoryMeetingCache
+from meeting_store import MeetingStore, MeetingSyncer
 
 
 class TestFlaskApp:
@@ -13,8 +15,16 @@ class TestFlaskApp:
     def client(self):
         app.config['TESTING'] = True
         app.config['UPLOAD_FOLDER'] = tempfile.mkdtemp()
-        with app.test_client() as client:
-            yield client
+        # Run the PDF stage in-thread so the mocked processor is used
+        app.config['PDF_PROCESS_WORKERS'] = 0
+        import app as app_module
+        store = MeetingStore(os.path.join(app.config['UPLOAD_FOLDER'], 'meeting_store.sqlite3'))
+        # Fresh meeting cache and store, so results never leak between tests
+        with patch('app.meeting_cache', MemoryMeetingCache()), \
+             patch('app.meeting_store', store), \
+             patch('app.meeting_syncer', MeetingSyncer(store, app_module.fetch_listings)):
+            with app.test_client() as client:
+                yield client
         shutil.rmtree(app.config['UPLOAD_FOLDER'])
     
     @pytest.fixture
@@ -71,7 +81,8 @@ class TestFlaskApp:
         
         mock_pdf_processor.download_pdf.return_value = '/fake/path.pdf'
         mock_pdf_processor.extract_text.return_value = 'Extracted text'
-        mock_pdf_processor.summarize_text.return_value = 'Summary text'
+        mock_pdf_processor.summarize_lengths.return_value = {2: 'Summary text', 5: 'Detailed summary text'}
+        mock_pdf_processor.ranked_sentences.return_value = [(0, 'Summary text')]
         
         response = client.post('/api/scrape', 
                              data=json.dumps({
@@ -85,6 +96,8 @@ class TestFlaskApp:
         assert data['success'] == True
         assert len(data['meetings']) == 1
         assert data['meetings'][0]['summary'] == 'Summary text'
+        assert data['meetings'][0]['detailed_summary'] == 'Detailed summary text'
+        assert 'ranked_sentences' not in data['meetings'][0]
     
     @patch('app.scraper')
     def test_scrape_data_no_pdf(self, mock_scraper, client):
@@ -157,6 +170,280 @@ class TestFlaskApp:
         assert data['success'] == False
         assert 'error' in data
     
+    @patch('app.scraper')
+    def test_scrape_data_filters_committees(self, mock_scraper, client):
+        mock_scraper.scrape_meetings.return_value = [
+            {
+                'title': committee,
+                'date': '15.03.2024',
+                'time': '18:00',
+                'location': 'Rathaus',
+                'committee': committee,
+                'detail_url': f'http://example.com/detail/{i}',
+                'pdf_url': None
+            }
+            for i, committee in enumerate(['Rat der Stadt Lünen', 'Jugendhilfeausschuss'])
+        ]
+        
+        response = client.post('/api/scrape',
+                             data=json.dumps({
+                                 'start_date': '2024-03-01',
+                                 'end_date': '2024-03-31',
+                                 'committees': ['Rat der Stadt Lünen']
+                             }),
+                             content_type='application/json')
+        
+        assert response.status_code == 200
+        meetings = json.loads(response.data)['meetings']
+        assert [m['committee'] for m in meetings] == ['Rat der Stadt Lünen']
+        # Detail pages are only fetched for the selected committees
+        resolved = mock_scraper.resolve_pdf_urls.call_args[0][0]
+        assert [m['committee'] for m in resolved] == ['Rat der Stadt Lünen']
+    
+    @patch('app.scraper')
+    def test_scrape_data_served_from_store(self, mock_scraper, client):
+        mock_scraper.scrape_meetings.return_value = []
+        
+        for _ in range(2):
+            client.post('/api/scrape',
+                        data=json.dumps({
+                            'start_date': '2020-03-01',
+                            'end_date': '2020-03-31'
+                        }),
+                        content_type='application/json')
+        
+        # Past months are fetched once, empty ones again after the refresh interval
+        assert mock_scraper.scrape_meetings.call_count == 1
+    
+    @patch('app.scraper')
+    def test_scrape_job(self, mock_scraper, client):
+        import time
+        mock_scraper.scrape_meetings.return_value = [
+            {
+                'title': 'Rat der Stadt Lünen',
+                'date': '15.03.2024',
+                'time': '18:00',
+                'location': 'Rathaus',
+                'committee': 'Rat der Stadt Lünen',
+                'detail_url': 'http://example.com/detail/1',
+                'pdf_url': None
+            }
+        ]
+        
+        response = client.post('/api/jobs',
+                             data=json.dumps({
+                                 'start_date': '2024-03-01',
+                                 'end_date': '2024-03-31'
+                             }),
+                             content_type='application/json')
+        
+        assert response.status_code == 202
+        job_id = json.loads(response.data)['job_id']
+        
+        for _ in range(500):
+            job = json.loads(client.get(f'/api/jobs/{job_id}').data)['job']
+            if job['status'] not in ('queued', 'running'):
+                break
+            time.sleep(0.01)
+        
+        assert job['status'] == 'done'
+        assert job['results'][0]['title'] == 'Rat der Stadt Lünen'
+        assert job['results'][0]['detail_page_url'].startswith('/meeting/')
+        assert job['progress']['pdfs_total'] == 0
+    
+    @patch('app.scraper')
+    def test_scrape_job_events(self, mock_scraper, client):
+        mock_scraper.scrape_meetings.return_value = [
+            {
+                'title': 'Rat der Stadt Lünen',
+                'date': '15.03.2024',
+                'time': '18:00',
+                'location': 'Rathaus',
+                'committee': 'Rat der Stadt Lünen',
+                'detail_url': 'http://example.com/detail/1'
+            }
+        ]
+        
+        def resolve(meetings):
+            for meeting in meetings:
+                meeting['pdf_url'] = None
+        mock_scraper.resolve_pdf_urls.side_effect = resolve
+        
+        response = client.post('/api/jobs',
+                             data=json.dumps({
+                                 'start_date': '2024-03-01',
+                                 'end_date': '2024-03-31'
+                             }),
+                             content_type='application/json')
+        job_id = json.loads(response.data)['job_id']
+        
+        # The stream ends once the job is finished
+        response = client.get(f'/api/jobs/{job_id}/events')
+        
+        assert response.mimetype == 'text/event-stream'
+        events = [block for block in response.get_data(as_text=True).split('\n\n') if block.startswith('id:')]
+        names = [block.split('\n')[1] for block in events]
+        assert names[0] == 'event: status'
+        assert 'event: result' in names
+        assert names[-1] == 'event: status'
+        assert '"done"' in events[-1]
+        
+        # Reconnecting with Last-Event-ID only sends newer events
+        response = client.get(f'/api/jobs/{job_id}/events', headers={'Last-Event-ID': str(len(events) - 1)})
+        assert response.get_data(as_text=True).count('id:') == 1
+    
+    @patch('app.scraper')
+    @patch('app.pdf_processor')
+    def test_scrape_data_reuses_cached_summaries(self, mock_pdf_processor, mock_scraper, client):
+        listing = {
+            'title': 'Rat der Stadt Lünen',
+            'date': '15.03.2024',
+            'time': '18:00',
+            'location': 'Rathaus',
+            'committee': 'Rat der Stadt Lünen',
+            'detail_url': 'https://luenen.ratsinfomanagement.net/tops/?__=4711',
+            'pdf_url': 'http://example.com/test.pdf'
+        }
+        mock_scraper.scrape_meetings.side_effect = lambda *args, **kwargs: [dict(listing)]
+        mock_pdf_processor.download_pdf.return_value = '/fake/path.pdf'
+        mock_pdf_processor.extract_text.return_value = 'Extracted text'
+        mock_pdf_processor.summarize_lengths.return_value = {2: 'Summary text', 5: 'Detailed summary text'}
+        mock_pdf_processor.ranked_sentences.return_value = [(0, 'Summary text')]
+        
+        results = []
+        for start_date in ('2024-03-01', '2024-03-10'):
+            response = client.post('/api/scrape',
+                                 data=json.dumps({
+                                     'start_date': start_date,
+                                     'end_date': '2024-03-31'
+                                 }),
+                                 content_type='application/json')
+            results.append(json.loads(response.data)['meetings'][0])
+        
+        # Same meeting, same ID in both queries; the PDF is only processed once
+        assert results[0]['id'] == results[1]['id'] == 'sitzung-4711'
+        assert results[1]['summary'] == 'Summary text'
+        assert mock_pdf_processor.download_pdf.call_count == 1
+    
+    @patch('app.scraper')
+    @patch('app.pdf_processor')
+    def test_scrape_data_retries_failed_pdf(self, mock_pdf_processor, mock_scraper, client):
+        listing = {
+            'title': 'Rat der Stadt Lünen',
+            'date': '15.03.2024',
+            'time': '18:00',
+            'location': 'Rathaus',
+            'committee': 'Rat der Stadt Lünen',
+            'detail_url': 'https://luenen.ratsinfomanagement.net/tops/?__=4711',
+            'pdf_url': 'http://example.com/test.pdf'
+        }
+        mock_scraper.scrape_meetings.side_effect = lambda *args, **kwargs: [dict(listing)]
+        # First download fails (download_pdf returns None), the second works
+        mock_pdf_processor.download_pdf.side_effect = [None, '/fake/path.pdf']
+        mock_pdf_processor.extract_text.return_value = 'Extracted text'
+        mock_pdf_processor.summarize_lengths.return_value = {2: 'Summary text', 5: 'Detailed summary text'}
+        mock_pdf_processor.ranked_sentences.return_value = [(0, 'Summary text')]
+        
+        results = []
+        for _ in range(2):
+            response = client.post('/api/scrape',
+                                 data=json.dumps({
+                                     'start_date': '2024-03-01',
+                                     'end_date': '2024-03-31'
+                                 }),
+                                 content_type='application/json')
+            results.append(json.loads(response.data)['meetings'][0])
+        
+        assert 'Fehler' in results[0]['summary']
+        assert results[1]['summary'] == 'Summary text'
+        assert mock_pdf_processor.download_pdf.call_count == 2
+    
+    @patch('app.scraper')
+    @patch('app.pdf_processor')
+    def test_prefetch_upcoming(self, mock_pdf_processor, mock_scraper, client):
+        import app as app_module
+        from datetime import datetime, timedelta
+        tomorrow = (datetime.now() + timedelta(days=1)).strftime('%d.%m.%Y')
+        mock_scraper.relevant_committees = ['Rat der Stadt Lünen']
+        mock_scraper.scrape_meetings.return_value = [
+            {
+                'title': committee,
+                'date': tomorrow,
+                'time': '18:00',
+                'location': 'Rathaus',
+                'committee': committee,
+                'detail_url': f'https://luenen.ratsinfomanagement.net/tops/?__={i}',
+                'pdf_url': f'http://example.com/{i}.pdf'
+            }
+            for i, committee in enumerate(['Rat der Stadt Lünen', 'Jugendhilfeausschuss'])
+        ]
+        mock_pdf_processor.download_pdf.return_value = '/fake/path.pdf'
+        mock_pdf_processor.extract_text.return_value = 'Extracted text'
+        mock_pdf_processor.summarize_lengths.return_value = {2: 'Summary text', 5: 'Detailed summary text'}
+        mock_pdf_processor.ranked_sentences.return_value = []
+        
+        app_module.prefetch_upcoming()
+        
+        # Only the relevant committee is summarized ahead of time
+        assert mock_pdf_processor.download_pdf.call_count == 1
+        assert app_module.meeting_cache.get('sitzung-0')['summary'] == 'Summary text'
+        assert 'sitzung-1' not in app_module.meeting_cache
+    
+    @patch('app.scraper')
+    def test_committees_from_index(self, mock_scraper, client):
+        import app as app_module
+        from datetime import datetime, timedelta
+        mock_scraper.relevant_committees = ['Rat der Stadt Lünen']
+        recent = datetime.now() - timedelta(days=10)
+        app_module.meeting_store.replace_month(recent.year, recent.month, [{
+            'title': 'Jugendhilfeausschuss',
+            'date': recent.strftime('%d.%m.%Y'),
+            'committee': 'Jugendhilfeausschuss',
+            'detail_url': 'https://luenen.ratsinfomanagement.net/tops/?__=1'
+        }])
+        app_module.meeting_store.replace_month(2015, 3, [{
+            'title': 'Bauausschuss',
+            'date': '10.03.2015',
+            'committee': 'Bauausschuss',
+            'detail_url': 'https://luenen.ratsinfomanagement.net/tops/?__=2'
+        }])
+        
+        data = json.loads(client.get('/api/committees').data)
+        
+        assert data['success'] is True
+        # Committees without meetings for a long time are left out
+        assert data['committees'] == ['Jugendhilfeausschuss', 'Rat der Stadt Lünen']
+        assert data['committee_stats']['Jugendhilfeausschuss'] == {
+            'count': 1,
+            'last_seen': recent.strftime('%Y-%m-%d')
+        }
+        # Served from the index, nothing is fetched on the request path
+        mock_scraper.scrape_meetings.assert_not_called()
+    
+    def test_scrape_job_unknown(self, client):
+        assert client.get('/api/jobs/unbekannt').status_code == 404
+        assert client.post('/api/jobs/unbekannt/cancel').status_code == 404
+    
+    def test_meeting_detail_summary_length(self, client):
+        import app as app_module
+        app_module.meeting_cache['test-meeting'] = {
+            'id': 'test-meeting',
+            'title': 'Rat der Stadt Lünen',
+            'date': '15.03.2024',
+            'time': '18:00',
+            'location': 'Rathaus',
+            'committee': 'Rat der Stadt Lünen',
+            'detailed_summary': 'Satz A. Satz B.',
+            'ranked_sentences': [(1, 'Satz B.'), (0, 'Satz A.')]
+        }
+        
+        response = client.get('/meeting/test-meeting?saetze=1')
+        
+        assert response.status_code == 200
+        assert 'Satz B.'.encode() in response.data
+        assert 'Satz A. Satz B.'.encode() not in response.data
+        del app_module.meeting_cache['test-meeting']
+    
     def test_scrape_data_invalid_json(self, client):
         response = client.post('/api/scrape',
                              data='invalid json',
@@ -173,27 +460,33 @@ class TestFlaskApp:
         assert response.status_code in [400, 500]
     
     @patch('app.export_manager')
-    @patch('app.send_file')
-    def test_export_data_markdown(self, mock_send_file, mock_export_manager, client, sample_meetings):
-        mock_export_manager.export.return_value = '/fake/path/export.md'
-        mock_send_file.return_value = 'file content'
+    def test_export_data_markdown(self, mock_export_manager, client, sample_meetings):
+        mock_export_manager.stream.return_value = (iter(['# Export\n', '## Rat\n']), 'text/markdown', 'export.md')
         
         response = client.get('/api/export/markdown', 
                             query_string={'data': json.dumps(sample_meetings)})
         
-        mock_export_manager.export.assert_called_once_with(sample_meetings, 'markdown')
-        mock_send_file.assert_called_once_with('/fake/path/export.md', as_attachment=True)
+        mock_export_manager.stream.assert_called_once_with(sample_meetings, 'markdown')
+        assert response.data.decode('utf-8') == '# Export\n## Rat\n'
+        assert response.mimetype == 'text/markdown'
+        assert 'attachment; filename=export.md' in response.headers['Content-Disposition']
     
     @patch('app.export_manager')
-    @patch('app.send_file')
-    def test_export_data_html(self, mock_send_file, mock_export_manager, client, sample_meetings):
-        mock_export_manager.export.return_value = '/fake/path/export.html'
-        mock_send_file.return_value = 'file content'
+    def test_export_data_html(self, mock_export_manager, client, sample_meetings):
+        mock_export_manager.stream.return_value = (iter(['<html>']), 'text/html', 'export.html')
         
         response = client.get('/api/export/html',
                             query_string={'data': json.dumps(sample_meetings)})
         
-        mock_export_manager.export.assert_called_once_with(sample_meetings, 'html')
+        mock_export_manager.stream.assert_called_once_with(sample_meetings, 'html')
+        mock_export_manager.export.assert_not_called()
+    
+    def test_export_data_streamed(self, client, sample_meetings):
+        response = client.post('/api/export/json', json={'meetings': sample_meetings})
+        
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert json.loads(response.data)['meetings'] == sample_meetings
     
     @patch('app.export_manager')
     @patch('app.send_file')
@@ -207,15 +500,43 @@ class TestFlaskApp:
         mock_export_manager.export.assert_called_once_with(sample_meetings, 'pdf')
     
     @patch('app.export_manager')
-    @patch('app.send_file')
-    def test_export_data_json(self, mock_send_file, mock_export_manager, client, sample_meetings):
-        mock_export_manager.export.return_value = '/fake/path/export.json'
-        mock_send_file.return_value = 'file content'
+    def test_export_data_json(self, mock_export_manager, client, sample_meetings):
+        mock_export_manager.stream.return_value = (iter(['{}']), 'application/json', 'export.json')
         
         response = client.get('/api/export/json',
                             query_string={'data': json.dumps(sample_meetings)})
         
-        mock_export_manager.export.assert_called_once_with(sample_meetings, 'json')
+        mock_export_manager.stream.assert_called_once_with(sample_meetings, 'json')
+    
+    def test_export_data_by_job(self, client, sample_meetings):
+        from jobs import Job
+        job = Job('job-1', 'scrape')
+        job.set_results(sample_meetings)
+        
+        with patch('app.job_manager') as mock_job_manager:
+            mock_job_manager.get.return_value = job
+            response = client.post('/api/export/markdown', json={'job_id': 'job-1'})
+            content = response.data.decode('utf-8')
+        
+        mock_job_manager.get.assert_called_once_with('job-1')
+        assert '## Rat der Stadt Lünen' in content
+        assert 'Test summary' in content
+    
+    def test_export_data_by_ids(self, client, sample_meetings):
+        import app as app_module
+        app_module.meeting_cache['sitzung-1'] = dict(sample_meetings[0], id='sitzung-1',
+                                                     ranked_sentences=[[0, 'Satz A.']])
+        
+        # The job has expired, so the meetings come from the cache
+        response = client.post('/api/export/json', json={'job_id': 'abgelaufen', 'ids': ['sitzung-1', 'sitzung-2']})
+        
+        assert json.loads(response.data)['meetings'] == [dict(sample_meetings[0], id='sitzung-1')]
+    
+    def test_export_data_by_evicted_ids(self, client):
+        response = client.post('/api/export/json', json={'ids': ['nicht-mehr-im-cache']})
+        
+        assert response.status_code == 400
+        assert 'Keine Daten' in json.loads(response.data)['error']
     
     def test_export_data_no_data(self, client):
         response = client.get('/api/export/markdown')
@@ -233,7 +554,7 @@ class TestFlaskApp:
     
     @patch('app.export_manager')
     def test_export_data_export_error(self, mock_export_manager, client, sample_meetings):
-        mock_export_manager.export.side_effect = Exception("Export error")
+        mock_export_manager.stream.side_effect = Exception("Export error")
         
         response = client.get('/api/export/markdown',
                             query_string={'data': json.dumps(sample_meetings)})
@@ -274,16 +595,16 @@ class TestFlaskApp:
                              }),
                              content_type='application/json')
         
-        # Verify that scraper was called with datetime objects
+        # The store is synced by whole months; the route filters the days
         args, kwargs = mock_scraper.scrape_meetings.call_args
         start_date, end_date = args
         
         assert start_date.year == 2024
         assert start_date.month == 3
-        assert start_date.day == 15
+        assert start_date.day == 1
         assert end_date.year == 2024
         assert end_date.month == 3
-        assert end_date.day == 20
+        assert end_date.day == 31
     
     def test_content_type_json(self, client):
         response = client.post('/api/scrape',
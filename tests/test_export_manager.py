@@ -3,9 +3,11 @@ import os
 import json
 import tempfile
 import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from unittest.mock import patch, MagicMock
-from export_manager import ExportManager
+from export_manager import ExportManager, get_export_template
 
 
 class TestExportManager:
@@ -106,7 +108,7 @@ class TestExportManager:
         
         with open(filename, 'r', encoding='utf-8') as f:
             content = f.read()
-            
+        
         assert "# Ratsinfo Lünen - Terminübersicht" in content
         assert "Rat der Stadt Lünen" in content
         assert "Rechnungsprüfungsausschuss" in content
@@ -124,7 +126,7 @@ class TestExportManager:
         
         with open(filename, 'r', encoding='utf-8') as f:
             content = f.read()
-            
+        
         assert "<!DOCTYPE html>" in content
         assert "Ratsinfo Lünen - Terminübersicht" in content
         assert "Rat der Stadt Lünen" in content
@@ -148,6 +150,20 @@ class TestExportManager:
         assert data['meetings'][0]['title'] == 'Rat der Stadt Lünen'
         assert data['meetings'][1]['title'] == 'Rechnungsprüfungsausschuss'
     
+    def test_export_json_same_meetings_stored_once(self, export_manager, sample_meetings, temp_dir):
+        export_manager.export_folder = temp_dir
+        
+        # export_date differs between the calls, the stored file is reused anyway
+        with patch.object(export_manager, 'iter_json', wraps=export_manager.iter_json) as mock_iter:
+            first = export_manager.export(sample_meetings, 'json')
+            second = export_manager.export([dict(meeting) for meeting in sample_meetings], 'json')
+            other = export_manager.export(sample_meetings[:1], 'json')
+        
+        assert first == second
+        assert other != first
+        assert mock_iter.call_count == 2
+        assert sorted(os.listdir(temp_dir)) == sorted([os.path.basename(first), os.path.basename(other)])
+    
     @patch('export_manager.HTML')
     def test_export_pdf_generation(self, mock_html, export_manager, sample_meetings, temp_dir):
         export_manager.export_folder = temp_dir
@@ -255,4 +271,192 @@ class TestExportManager:
             data = json.load(f)
         
         assert data['meetings'][0]['title'] == 'Unicode Test äöüß'
-        assert '€£¥' in data['meetings'][0]['summary']
\ No newline at end of file
+        assert '€£¥' in data['meetings'][0]['summary']
+    
+    def test_stream_consumes_meetings_lazily(self, export_manager, sample_meetings):
+        consumed = []
+        
+        def meetings():
+            for meeting in sample_meetings:
+                consumed.append(meeting['title'])
+                yield meeting
+        
+        chunks, mimetype, download_name = export_manager.stream(meetings(), 'markdown')
+        
+        assert mimetype == 'text/markdown'
+        assert download_name.endswith('.md')
+        assert consumed == []
+        
+        content = ''
+        for chunk in chunks:
+            content += chunk
+            if 'Rat der Stadt Lünen' in chunk:
+                assert consumed == ['Rat der Stadt Lünen']
+        assert consumed == ['Rat der Stadt Lünen', 'Rechnungsprüfungsausschuss']
+        assert "Jahresabschluss 2023" in content
+    
+    def test_stream_json_is_valid(self, export_manager, sample_meetings):
+        for meetings in ([], sample_meetings):
+            chunks, mimetype, download_name = export_manager.stream(iter(meetings), 'json')
+            
+            assert json.loads(''.join(chunks))['meetings'] == meetings
+    
+    def test_stream_unsupported_format(self, export_manager, sample_meetings):
+        with pytest.raises(ValueError):
+            export_manager.stream(sample_meetings, 'pdf')
+    
+    def test_html_fields_are_escaped(self, export_manager):
+        meetings = [
+            {
+                'title': '<script>alert(1)</script>',
+                'date': '15.03.2024',
+                'time': '18:00',
+                'location': 'Test Location',
+                'committee': 'Bau & Verkehr',
+                'summary': 'Test summary',
+                'pdf_url': 'http://example.com/test.pdf?a=1&b=2'
+            }
+        ]
+        
+        html_content = export_manager._generate_html_content(meetings)
+        
+        assert '<script>' not in html_content
+        assert '&lt;script&gt;' in html_content
+        assert 'Bau &amp; Verkehr' in html_content
+        assert 'href="http://example.com/test.pdf?a=1&amp;b=2"' in html_content
+    
+    def test_markdown_is_not_escaped(self, export_manager, sample_meetings):
+        meetings = [dict(sample_meetings[0], summary='Straße & Fußgängerzone')]
+        
+        content = ''.join(export_manager.iter_markdown(meetings))
+        
+        assert 'Straße & Fußgängerzone' in content
+    
+    def test_templates_compiled_once(self):
+        assert get_export_template('export.html') is get_export_template('export.html')
+
+
+class TestPDFExport:
+    
+    @pytest.fixture
+    def temp_dir(self):
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir)
+    
+    @pytest.fixture
+    def weasyprint(self):
+        def write_pdf(filename, **kwargs):
+            with open(filename, 'wb') as f:
+                f.write(b'%PDF-1.7')
+        
+        with patch('export_manager.WEASYPRINT_AVAILABLE', True), \
+             patch('export_manager.CSS', create=True) as mock_css, \
+             patch('export_manager.HTML', create=True) as mock_html:
+            mock_html.return_value.write_pdf.side_effect = write_pdf
+            mock_html.return_value.render.return_value.copy.return_value.write_pdf.side_effect = write_pdf
+            yield mock_html, mock_css
+    
+    def make_meetings(self, *dates):
+        return [
+            {
+                'title': f'Sitzung {index}',
+                'date': date,
+                'time': '18:00',
+                'location': 'Rathaus',
+                'committee': 'Rat der Stadt Lünen',
+                'summary': 'Test summary',
+                'pdf_url': ''
+            }
+            for index, date in enumerate(dates)
+        ]
+    
+    def test_identical_export_served_from_disk(self, weasyprint, temp_dir):
+        mock_html, mock_css = weasyprint
+        export_manager = ExportManager()
+        export_manager.export_folder = temp_dir
+        meetings = self.make_meetings('15.03.2024')
+        
+        first = export_manager.export(meetings, 'pdf')
+        second = export_manager.export(list(meetings), 'pdf')
+        other = export_manager.export(self.make_meetings('16.03.2024'), 'pdf')
+        
+        assert first == second
+        assert other != first
+        assert os.path.exists(first)
+        assert mock_html.call_count == 2
+        # The stylesheet is parsed once, at init
+        mock_css.assert_called_once()
+    
+    def test_large_export_rendered_by_month(self, weasyprint, temp_dir):
+        mock_html, mock_css = weasyprint
+        export_manager = ExportManager(pdf_chunk_threshold=2)
+        export_manager.export_folder = temp_dir
+        
+        filename = export_manager.export(self.make_meetings('05.03.2024', '20.03.2024', '10.04.2024'), 'pdf')
+        
+        assert os.path.exists(filename)
+        assert mock_html.call_count == 2
+        first_month = mock_html.call_args_list[0][1]['string']
+        second_month = mock_html.call_args_list[1][1]['string']
+        assert 'Sitzung 0' in first_month and 'Sitzung 1' in first_month
+        assert 'Sitzung 2' in second_month
+        # Only the first part carries the document heading
+        assert '<h1>' in first_month
+        assert '<h1>' not in second_month
+        mock_html.return_value.render.return_value.copy.assert_called_once()
+    
+    def test_failed_export_not_cached(self, weasyprint, temp_dir):
+        mock_html, mock_css = weasyprint
+        export_manager = ExportManager()
+        export_manager.export_folder = temp_dir
+        
+        def write_partial_pdf(filename, **kwargs):
+            with open(filename, 'wb') as f:
+                f.write(b'%PDF')
+            raise Exception("Layout error")
+        
+        mock_html.return_value.write_pdf.side_effect = write_partial_pdf
+        with pytest.raises(Exception):
+            export_manager.export(self.make_meetings('15.03.2024'), 'pdf')
+        
+        assert os.listdir(temp_dir) == []
+    
+    def test_different_exports_render_concurrently(self, weasyprint, temp_dir):
+        mock_html, mock_css = weasyprint
+        export_manager = ExportManager()
+        export_manager.export_folder = temp_dir
+        started = threading.Event()
+        release = threading.Event()
+        
+        def write_pdf(filename, **kwargs):
+            if not started.is_set():
+                started.set()
+                # The first render waits until another export has finished
+                assert release.wait(5)
+            with open(filename, 'wb') as f:
+                f.write(b'%PDF-1.7')
+        
+        mock_html.return_value.write_pdf.side_effect = write_pdf
+        slow = threading.Thread(target=export_manager.export, args=(self.make_meetings('15.03.2024'), 'pdf'))
+        slow.start()
+        assert started.wait(5)
+        
+        other = export_manager.export(self.make_meetings('16.03.2024'), 'pdf')
+        release.set()
+        slow.join(5)
+        
+        assert os.path.exists(other)
+        assert len(os.listdir(temp_dir)) == 2
+    
+    def test_same_export_rendered_once(self, weasyprint, temp_dir):
+        mock_html, mock_css = weasyprint
+        export_manager = ExportManager()
+        export_manager.export_folder = temp_dir
+        meetings = self.make_meetings('15.03.2024')
+        
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            filenames = list(executor.map(lambda _: export_manager.export(list(meetings), 'pdf'), range(4)))
+        
+        assert len(set(filenames)) == 1
+        assert mock_html.call_count == 1
@@ -0,0 +1,91 @@
+import pytest
+import os
+import tempfile
+import shutil
+import time
+from export_store import ExportStore
+
+
+class TestExportStore:
+    
+    @pytest.fixture
+    def temp_dir(self):
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir)
+    
+    def age(self, path, seconds):
+        timestamp = time.time() - seconds
+        os.utime(path, (timestamp, timestamp))
+    
+    def test_identical_content_stored_once(self, temp_dir):
+        store = ExportStore(temp_dir)
+        
+        first = store.save(['# Export\n', 'Rat der Stadt Lünen\n'], 'md')
+        second = store.save(['# Export\nRat der Stadt Lünen\n'], 'md')
+        other = store.save(['# Export\n'], 'md')
+        
+        assert first == second
+        assert other != first
+        assert sorted(os.listdir(temp_dir)) == sorted([os.path.basename(first), os.path.basename(other)])
+        with open(first, encoding='utf-8') as f:
+            assert f.read() == '# Export\nRat der Stadt Lünen\n'
+    
+    def test_failed_save_leaves_nothing(self, temp_dir):
+        store = ExportStore(temp_dir)
+        
+        def chunks():
+            yield '# Export\n'
+            raise Exception("Renderfehler")
+        
+        with pytest.raises(Exception):
+            store.save(chunks(), 'md')
+        
+        assert os.listdir(temp_dir) == []
+    
+    def test_get_named_export(self, temp_dir):
+        store = ExportStore(temp_dir)
+        assert store.get('ratsinfo_export_abc.pdf') is None
+        
+        temp_path = store.temp_path('.pdf')
+        with open(temp_path, 'wb') as f:
+            f.write(b'%PDF-1.7')
+        path = store.add(temp_path, 'ratsinfo_export_abc.pdf')
+        
+        assert store.get('ratsinfo_export_abc.pdf') == path
+        assert not os.path.exists(temp_path)
+    
+    def test_collect_removes_expired_exports(self, temp_dir):
+        store = ExportStore(temp_dir, max_age=3600)
+        old = store.save(['alt'], 'md')
+        new = store.save(['neu'], 'md')
+        self.age(old, 7200)
+        self.age(new, 600)
+        
+        assert store.collect() == 1
+        assert not os.path.exists(old)
+        assert os.path.exists(new)
+    
+    def test_collect_enforces_size_limit(self, temp_dir):
+        store = ExportStore(temp_dir, max_bytes=250)
+        paths = [store.save([str(index) * 100], 'md') for index in range(3)]
+        for index, path in enumerate(paths):
+            self.age(path, 600 - index)
+        
+        store.collect()
+        
+        assert not os.path.exists(paths[0])
+        assert os.path.exists(paths[1])
+        assert os.path.exists(paths[2])
+        assert store.total_size() <= 250
+    
+    def test_collect_keeps_recent_and_foreign_files(self, temp_dir):
+        store = ExportStore(temp_dir, max_bytes=10, max_age=0)
+        recent = store.save(['x' * 100], 'md')
+        gitkeep = os.path.join(temp_dir, '.gitkeep')
+        open(gitkeep, 'w').close()
+        self.age(gitkeep, 7200)
+        
+        assert store.collect() == 0
+        assert os.path.exists(recent)
+        assert os.path.exists(gitkeep)
@@ -0,0 +1,92 @@
+import pytest
+import os
+import tempfile
+import shutil
+import responses
+from http_cache import HTTPCache, CachedSession
+
+
+class TestHTTPCache:
+    
+    @pytest.fixture
+    def temp_dir(self):
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir)
+    
+    @pytest.fixture
+    def cache(self, temp_dir):
+        return HTTPCache(os.path.join(temp_dir, 'http_cache.sqlite3'))
+    
+    @pytest.fixture
+    def session(self, cache):
+        return CachedSession(cache, default_ttl=60)
+    
+    @responses.activate
+    def test_get_served_from_cache(self, session):
+        url = "http://example.com/detail/1"
+        responses.add(responses.GET, url, body="<html>Detail</html>", status=200)
+        
+        first = session.get(url)
+        second = session.get(url)
+        
+        assert len(responses.calls) == 1
+        assert second.text == first.text == "<html>Detail</html>"
+        assert getattr(second, 'from_cache', False)
+    
+    @responses.activate
+    def test_post_keyed_by_body(self, session):
+        url = "http://example.com/json"
+        responses.add(responses.POST, url, json=[1], status=200)
+        responses.add(responses.POST, url, json=[2], status=200)
+        
+        assert session.post(url, data={'start': '2024-01-01'}).json() == [1]
+        assert session.post(url, data={'start': '2024-02-01'}).json() == [2]
+        assert session.post(url, data={'start': '2024-01-01'}).json() == [1]
+        assert len(responses.calls) == 2
+    
+    @responses.activate
+    def test_expired_entry_revalidated_with_etag(self, session):
+        url = "http://example.com/detail/1"
+        responses.add(responses.GET, url, body="original", status=200, headers={'ETag': '"v1"'})
+        responses.add(responses.GET, url, status=304)
+        
+        session.get(url, cache_ttl=0.01)
+        import time
+        time.sleep(0.02)
+        response = session.get(url)
+        
+        assert response.text == "original"
+        assert responses.calls[1].request.headers['If-None-Match'] == '"v1"'
+    
+    @responses.activate
+    def test_cache_bypass(self, session):
+        url = "http://example.com/termine/"
+        responses.add(responses.GET, url, body="token", status=200)
+        
+        session.get(url, cache=False)
+        session.get(url, cache=False)
+        
+        assert len(responses.calls) == 2
+    
+    @responses.activate
+    def test_streamed_response_cached(self, session):
+        url = "http://example.com/test.pdf"
+        responses.add(responses.GET, url, body=b"%PDF-1.4 content", status=200,
+                      headers={'Content-Length': '16'})
+        
+        session.get(url, stream=True).content
+        cached = session.get(url, stream=True)
+        
+        assert b"".join(cached.iter_content(chunk_size=4)) == b"%PDF-1.4 content"
+        assert len(responses.calls) == 1
+    
+    def test_size_bounded_eviction(self, temp_dir):
+        cache = HTTPCache(os.path.join(temp_dir, 'small.sqlite3'), max_bytes=100)
+        
+        for i in range(5):
+            cache.set(f"key{i}", f"http://example.com/{i}", 200, {}, b"x" * 40, ttl=60)
+        
+        assert cache.total_size() <= 100
+        assert cache.get("key4") is not None
+        assert cache.get("key0") is None
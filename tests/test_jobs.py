@@ -0,0 +1,134 @@
+import pytest
+import threading
+import time
+from jobs import JobManager, JobCancelled
+
+
+class TestJobManager:
+    
+    @pytest.fixture
+    def job_manager(self):
+        return JobManager(max_workers=1)
+    
+    def wait_for(self, job, timeout=5):
+        for _ in range(int(timeout / 0.01)):
+            if job.finished:
+                return
+            time.sleep(0.01)
+        raise AssertionError(f"Job {job.id} did not finish")
+    
+    def test_job_reports_progress_and_results(self, job_manager):
+        def work(job):
+            job.set_results([None, None])
+            job.update_result(1, 'zweites')
+            job.update_progress(done=1, total=2)
+        
+        job = job_manager.submit('test', work)
+        self.wait_for(job)
+        
+        state = job_manager.get(job.id).to_dict()
+        assert state['status'] == 'done'
+        assert state['results'] == [None, 'zweites']
+        assert state['progress'] == {'done': 1, 'total': 2}
+    
+    def test_job_arguments(self, job_manager):
+        received = []
+        job = job_manager.submit('test', lambda a, b, job: received.append((a, b)), 1, 2)
+        self.wait_for(job)
+        
+        assert received == [(1, 2)]
+    
+    def test_failed_job(self, job_manager):
+        def work(job):
+            raise ValueError("kaputt")
+        
+        job = job_manager.submit('test', work)
+        self.wait_for(job)
+        
+        assert job.status == 'failed'
+        assert job.error == 'kaputt'
+    
+    def test_cancel_running_job(self, job_manager):
+        started = threading.Event()
+        
+        def work(job):
+            started.set()
+            while True:
+                job.check_cancelled()
+                time.sleep(0.01)
+        
+        job = job_manager.submit('test', work)
+        assert started.wait(5)
+        assert job_manager.cancel(job.id) is True
+        self.wait_for(job)
+        
+        assert job.status == 'cancelled'
+    
+    def test_cancel_queued_job(self, job_manager):
+        release = threading.Event()
+        blocker = job_manager.submit('test', lambda job: release.wait(5))
+        queued = job_manager.submit('test', lambda job: None)
+        
+        job_manager.cancel(queued.id)
+        release.set()
+        self.wait_for(blocker)
+        self.wait_for(queued)
+        
+        assert queued.status == 'cancelled'
+    
+    def test_cancel_unknown_job(self, job_manager):
+        assert job_manager.cancel('unbekannt') is False
+        assert job_manager.get('unbekannt') is None
+    
+    def test_check_cancelled(self, job_manager):
+        job = job_manager.submit('test', lambda job: None)
+        self.wait_for(job)
+        job.cancel()
+        
+        with pytest.raises(JobCancelled):
+            job.check_cancelled()
+    
+    def test_finished_jobs_are_pruned(self):
+        job_manager = JobManager(max_workers=1, max_finished=1)
+        first = job_manager.submit('test', lambda job: None)
+        self.wait_for(first)
+        second = job_manager.submit('test', lambda job: None)
+        self.wait_for(second)
+        job_manager.submit('test', lambda job: None)
+        
+        assert job_manager.get(first.id) is None
+        assert job_manager.get(second.id) is second
+    
+    def test_wait_events(self, job_manager):
+        release = threading.Event()
+        
+        def work(job):
+            job.update_progress(done=0)
+            release.wait(5)
+        
+        job = job_manager.submit('test', work)
+        events = []
+        while ('progress', {'done': 0}) not in events:
+            new_events, finished = job.wait_events(len(events), timeout=5)
+            assert new_events and not finished
+            events.extend(new_events)
+        
+        assert events[0] == ('status', {'status': 'running', 'error': None})
+        
+        release.set()
+        self.wait_for(job)
+        events, finished = job.wait_events(0, timeout=0)
+        assert finished
+        assert events[-1] == ('status', {'status': 'done', 'error': None})
+    
+    def test_active_count(self, job_manager):
+        release = threading.Event()
+        job = job_manager.submit('scrape', lambda job: release.wait(5))
+        
+        assert job_manager.active_count() == 1
+        assert job_manager.active_count('scrape') == 1
+        assert job_manager.active_count('prefetch') == 0
+        
+        release.set()
+        self.wait_for(job)
+        assert job_manager.active_count() == 0
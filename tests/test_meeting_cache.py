@@ -0,0 +1,96 @@
+import pytest
+import os
+import tempfile
+import shutil
+from meeting_cache import MemoryMeetingCache, SQLiteMeetingCache, create_meeting_cache
+
+
+def make_meeting(meeting_id, text_length=100):
+    return {
+        'id': meeting_id,
+        'title': 'Rat der Stadt Lünen',
+        'date': '15.03.2024',
+        'full_text': 'x' * text_length,
+        'ranked_sentences': [(0, 'Satz A.')]
+    }
+
+
+class TestMemoryMeetingCache:
+    
+    def test_set_get_delete(self):
+        cache = MemoryMeetingCache()
+        cache['a'] = make_meeting('a')
+        
+        assert 'a' in cache
+        assert cache['a']['id'] == 'a'
+        assert cache.get('b') is None
+        assert len(cache) == 1
+        
+        del cache['a']
+        assert 'a' not in cache
+        with pytest.raises(KeyError):
+            cache['a']
+    
+    def test_evicts_least_recently_used(self):
+        cache = MemoryMeetingCache(max_bytes=500)
+        cache['a'] = make_meeting('a')
+        cache['b'] = make_meeting('b')
+        cache.get('a')
+        cache['c'] = make_meeting('c')
+        
+        assert 'a' in cache
+        assert 'b' not in cache
+        assert 'c' in cache
+        assert cache.total_size() <= 500
+    
+    def test_replacing_entry_updates_size(self):
+        cache = MemoryMeetingCache()
+        cache['a'] = make_meeting('a', text_length=1000)
+        cache['a'] = make_meeting('a', text_length=10)
+        
+        assert cache.total_size() < 1000
+
+
+class TestSQLiteMeetingCache:
+    
+    @pytest.fixture
+    def temp_dir(self):
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir)
+    
+    def test_survives_restart(self, temp_dir):
+        path = os.path.join(temp_dir, 'meetings.sqlite3')
+        SQLiteMeetingCache(path)['a'] = make_meeting('a')
+        
+        meeting = SQLiteMeetingCache(path).get('a')
+        
+        assert meeting['title'] == 'Rat der Stadt Lünen'
+        assert meeting['ranked_sentences'] == [[0, 'Satz A.']]
+    
+    def test_delete(self, temp_dir):
+        cache = SQLiteMeetingCache(os.path.join(temp_dir, 'meetings.sqlite3'))
+        cache['a'] = make_meeting('a')
+        
+        del cache['a']
+        
+        assert 'a' not in cache
+        assert len(cache) == 0
+        with pytest.raises(KeyError):
+            del cache['a']
+    
+    def test_evicts_least_recently_used(self, temp_dir):
+        cache = SQLiteMeetingCache(os.path.join(temp_dir, 'meetings.sqlite3'), max_bytes=500)
+        cache['a'] = make_meeting('a')
+        cache['b'] = make_meeting('b')
+        cache['c'] = make_meeting('c')
+        
+        assert 'a' not in cache
+        assert 'c' in cache
+        assert cache.total_size() <= 500
+    
+    def test_create_meeting_cache(self, temp_dir):
+        assert isinstance(create_meeting_cache('memory', temp_dir, 1024), MemoryMeetingCache)
+        assert isinstance(create_meeting_cache('sqlite', temp_dir, 1024), SQLiteMeetingCache)
+        with pytest.raises(ValueError):
+            create_meeting_cache('redis', temp_dir, 1024)
@@ -0,0 +1,251 @@
+import pytest
+import os
+import tempfile
+import shutil
+import threading
+import time
+from datetime import datetime
+from unittest.mock import MagicMock
+from meeting_store import MeetingStore, MeetingSyncer
+from scraper import ScrapeError
+
+
+def make_meeting(date, committee='Rat der Stadt Lünen', number=1, **fields):
+    meeting = {
+        'title': committee,
+        'date': date,
+        'time': '18:00',
+        'location': 'Rathaus',
+        'committee': committee,
+        'detail_url': f'https://luenen.ratsinfomanagement.net/tops/?__={number}'
+    }
+    meeting.update(fields)
+    return meeting
+
+
+class TestMeetingStore:
+    
+    @pytest.fixture
+    def store(self):
+        temp_dir = tempfile.mkdtemp()
+        yield MeetingStore(os.path.join(temp_dir, 'meeting_store.sqlite3'))
+        shutil.rmtree(temp_dir)
+    
+    def test_query_by_date_and_committee(self, store):
+        store.replace_month(2024, 3, [
+            make_meeting('20.03.2024', number=2),
+            make_meeting('05.03.2024', committee='Jugendhilfeausschuss', number=1),
+            make_meeting('28.03.2024', number=3)
+        ])
+        
+        meetings = store.query(datetime(2024, 3, 1), datetime(2024, 3, 25))
+        assert [m['date'] for m in meetings] == ['05.03.2024', '20.03.2024']
+        assert meetings[1]['id'] == 'sitzung-2'
+        
+        meetings = store.query(datetime(2024, 3, 1), datetime(2024, 3, 31), committees=['Rat der Stadt Lünen'])
+        assert [m['date'] for m in meetings] == ['20.03.2024', '28.03.2024']
+    
+    def test_replace_month_removes_vanished_meetings(self, store):
+        store.replace_month(2024, 3, [make_meeting('20.03.2024', number=1), make_meeting('21.03.2024', number=2)])
+        store.replace_month(2024, 3, [make_meeting('21.03.2024', number=2)])
+        
+        assert [m['id'] for m in store.query(datetime(2024, 3, 1), datetime(2024, 3, 31))] == ['sitzung-2']
+    
+    def test_replace_month_keeps_resolved_pdf_url(self, store):
+        store.replace_month(2024, 3, [make_meeting('20.03.2024')])
+        store.set_pdf_urls({'sitzung-1': 'http://example.com/1.pdf'})
+        store.replace_month(2024, 3, [make_meeting('20.03.2024')])
+        
+        meeting = store.query(datetime(2024, 3, 1), datetime(2024, 3, 31))[0]
+        assert meeting['pdf_url'] == 'http://example.com/1.pdf'
+    
+    def test_unresolved_and_missing_pdf(self, store):
+        store.replace_month(2024, 3, [make_meeting('20.03.2024', number=1), make_meeting('21.03.2024', number=2)])
+        store.set_pdf_urls({'sitzung-2': None})
+        
+        meetings = store.query(datetime(2024, 3, 1), datetime(2024, 3, 31))
+        assert meetings[0]['pdf_url'] is None
+        assert meetings[1]['pdf_url'] == ''
+    
+    def test_committees(self, store):
+        store.replace_month(2024, 3, [
+            make_meeting('20.03.2024', number=1),
+            make_meeting('21.03.2024', committee='Jugendhilfeausschuss', number=2),
+            make_meeting('22.03.2024', number=3)
+        ])
+        
+        assert store.committees() == ['Jugendhilfeausschuss', 'Rat der Stadt Lünen']
+        assert store.committees(start_date=datetime(2024, 3, 22)) == ['Rat der Stadt Lünen']
+    
+    def test_committee_index(self, store):
+        store.replace_month(2024, 3, [
+            make_meeting('20.03.2024', number=1),
+            make_meeting('21.03.2024', committee='Jugendhilfeausschuss', number=2)
+        ])
+        store.replace_month(2024, 4, [make_meeting('10.04.2024', number=3)])
+        
+        index = store.committee_index()
+        assert index['Rat der Stadt Lünen'] == {'count': 2, 'first_seen': '2024-03-20', 'last_seen': '2024-04-10'}
+        assert index['Jugendhilfeausschuss']['count'] == 1
+        
+        # The committee vanishes with its last meeting
+        store.replace_month(2024, 3, [make_meeting('20.03.2024', number=1)])
+        assert 'Jugendhilfeausschuss' not in store.committee_index()
+        assert store.committee_index()['Rat der Stadt Lünen']['count'] == 2
+    
+    def test_committee_index_survives_restart(self, store):
+        store.replace_month(2024, 3, [make_meeting('20.03.2024')])
+        
+        assert MeetingStore(store.path).committee_index() == store.committee_index()
+    
+    def test_committee_index_built_for_existing_store(self, store):
+        store.replace_month(2024, 3, [make_meeting('20.03.2024')])
+        with store._conn:
+            store._conn.execute("DROP TABLE committees")
+        
+        assert MeetingStore(store.path).committee_index()['Rat der Stadt Lünen']['count'] == 1
+
+
+class TestMeetingSyncer:
+    
+    @pytest.fixture
+    def store(self):
+        temp_dir = tempfile.mkdtemp()
+        yield MeetingStore(os.path.join(temp_dir, 'meeting_store.sqlite3'))
+        shutil.rmtree(temp_dir)
+    
+    def test_contiguous_months_in_one_fetch(self, store):
+        fetch = MagicMock(return_value=[make_meeting('10.01.2020', number=1), make_meeting('10.02.2020', number=2)])
+        syncer = MeetingSyncer(store, fetch)
+        
+        assert syncer.sync_range(datetime(2020, 1, 15), datetime(2020, 2, 15)) == 2
+        
+        fetch.assert_called_once()
+        start_date, end_date = fetch.call_args[0]
+        assert start_date == datetime(2020, 1, 1)
+        assert (end_date.year, end_date.month, end_date.day) == (2020, 2, 29)
+        assert len(store.query(datetime(2020, 1, 1), datetime(2020, 2, 29))) == 2
+    
+    def test_past_months_are_final(self, store):
+        fetch = MagicMock(return_value=[make_meeting('10.01.2020')])
+        syncer = MeetingSyncer(store, fetch, refresh_interval=0)
+        
+        syncer.sync_range(datetime(2020, 1, 1), datetime(2020, 1, 31))
+        time.sleep(0.01)
+        
+        assert syncer.sync_range(datetime(2020, 1, 1), datetime(2020, 1, 31)) == 0
+        assert fetch.call_count == 1
+    
+    def test_current_month_is_refreshed(self, store):
+        today = datetime.now()
+        fetch = MagicMock(return_value=[])
+        syncer = MeetingSyncer(store, fetch, refresh_interval=3600)
+        
+        syncer.sync_range(today, today)
+        assert not syncer.is_stale(today.year, today.month)
+        
+        syncer.refresh_interval = 0
+        time.sleep(0.01)
+        assert syncer.is_stale(today.year, today.month)
+    
+    def test_progress_covers_all_stale_months(self, store):
+        def fetch(start_date, end_date, progress=None):
+            progress(1, 1)
+            return []
+        
+        store.replace_month(2020, 2, [make_meeting('10.02.2020')])
+        syncer = MeetingSyncer(store, fetch)
+        reports = []
+        
+        # February is final, so January and March are fetched separately
+        syncer.sync_range(datetime(2020, 1, 1), datetime(2020, 3, 31),
+                          progress=lambda done, total: reports.append((done, total)))
+        
+        assert reports == [(1, 2), (2, 2)]
+    
+    def test_failed_fetch_keeps_stored_month(self, store):
+        today = datetime.now()
+        fetch = MagicMock(return_value=[make_meeting(today.strftime('%d.%m.%Y'))])
+        syncer = MeetingSyncer(store, fetch, refresh_interval=0)
+        syncer.sync_range(today, today)
+        time.sleep(0.01)
+        
+        fetch.side_effect = ScrapeError("Netzwerkfehler")
+        assert syncer.sync_range(today, today) == 0
+        
+        assert len(store.query(today.replace(day=1), today)) == 1
+        assert 'Rat der Stadt Lünen' in store.committee_index()
+        assert syncer.is_stale(today.year, today.month)
+    
+    def test_empty_listing_keeps_stored_month(self, store):
+        today = datetime.now()
+        fetch = MagicMock(return_value=[make_meeting(today.strftime('%d.%m.%Y'))])
+        syncer = MeetingSyncer(store, fetch, refresh_interval=0)
+        syncer.sync_range(today, today)
+        time.sleep(0.01)
+        
+        fetch.return_value = []
+        assert syncer.sync_range(today, today) == 0
+        assert 'Rat der Stadt Lünen' in store.committee_index()
+    
+    def test_failed_fetch_without_stored_data_raises(self, store):
+        syncer = MeetingSyncer(store, MagicMock(side_effect=ScrapeError("Netzwerkfehler")))
+        
+        with pytest.raises(ScrapeError):
+            syncer.sync_range(datetime(2020, 1, 1), datetime(2020, 1, 31))
+    
+    def test_fetch_does_not_block_other_months(self, store):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        
+        def fetch(start_date, end_date, progress=None):
+            calls.append(start_date.month)
+            if start_date.month == 1:
+                started.set()
+                release.wait(5)
+            return []
+        
+        syncer = MeetingSyncer(store, fetch)
+        slow = threading.Thread(target=syncer.sync_range, args=(datetime(2020, 1, 1), datetime(2020, 1, 31)))
+        slow.start()
+        try:
+            assert started.wait(5)
+            
+            # Another month is synced while January is still being fetched
+            assert syncer.sync_range(datetime(2020, 3, 1), datetime(2020, 3, 31)) == 1
+            
+            # January is not fetched twice; the second caller waits for the first
+            waiting = threading.Thread(target=syncer.sync_range, args=(datetime(2020, 1, 1), datetime(2020, 1, 31)))
+            waiting.start()
+            time.sleep(0.05)
+            assert waiting.is_alive()
+        finally:
+            release.set()
+            slow.join(5)
+        
+        waiting.join(5)
+        assert not waiting.is_alive()
+        assert calls == [1, 3]
+    
+    def test_start_syncs_initial_range_once(self, store):
+        ranges = []
+        done = threading.Event()
+        
+        def fetch(start_date, end_date, progress=None):
+            ranges.append((start_date.year, start_date.month))
+            if start_date.year == 2020:
+                done.set()
+            return []
+        
+        syncer = MeetingSyncer(store, fetch)
+        syncer.start(3600, lookback_months=0, lookahead_months=0,
+                     initial_range=(datetime(2020, 1, 1), datetime(2020, 2, 29)))
+        try:
+            assert done.wait(5)
+        finally:
+            syncer.stop()
+        
+        # The regular window first, then the wider initial range
+        today = datetime.now()
+        assert ranges == [(today.year, today.month), (2020, 1)]
@@ -2,6 +2,7 @@ import pytest
 import os
 import tempfile
 import shutil
+import itertools
 from unittest.mock import patch, mock_open, MagicMock
 from pdf_processor import PDFProcessor
 
@@ -65,6 +66,58 @@ class TestPDFProcessor:
         
         assert result_path is None
     
+    @patch('pdf_processor.requests.Session.get')
+    def test_download_pdf_skips_present_file(self, mock_get, pdf_processor, temp_dir):
+        mock_response = MagicMock()
+        mock_response.headers = {}
+        mock_response.iter_content.return_value = [b'fake pdf content']
+        mock_get.return_value = mock_response
+        
+        first = pdf_processor.download_pdf("http://example.com/test.pdf", temp_dir)
+        second = pdf_processor.download_pdf("http://example.com/test.pdf", temp_dir)
+        
+        assert first == second
+        assert mock_get.call_count == 1
+    
+    @patch('pdf_processor.requests.Session.get')
+    def test_download_pdf_revalidates_with_etag(self, mock_get, pdf_processor, temp_dir):
+        first_response = MagicMock()
+        first_response.status_code = 200
+        first_response.headers = {'ETag': '"abc"'}
+        first_response.iter_content.return_value = [b'fake pdf content']
+        not_modified = MagicMock()
+        not_modified.status_code = 304
+        mock_get.side_effect = [first_response, not_modified]
+        
+        first = pdf_processor.download_pdf("http://example.com/test.pdf", temp_dir)
+        second = pdf_processor.download_pdf("http://example.com/test.pdf", temp_dir)
+        
+        assert first == second
+        assert mock_get.call_args.kwargs['headers'] == {'If-None-Match': '"abc"'}
+    
+    @patch('pdf_processor.requests.Session.get')
+    def test_download_pdf_deduplicates_content(self, mock_get, pdf_processor, temp_dir):
+        mock_response = MagicMock()
+        mock_response.headers = {}
+        mock_response.iter_content.side_effect = lambda chunk_size: iter([b'same content'])
+        mock_get.return_value = mock_response
+        
+        first = pdf_processor.download_pdf("http://example.com/a.pdf", temp_dir)
+        second = pdf_processor.download_pdf("http://example.com/b.pdf", temp_dir)
+        
+        assert first == second
+        assert len([f for f in os.listdir(temp_dir) if f.endswith('.pdf')]) == 1
+    
+    @patch('pdf_processor.requests.Session.get')
+    def test_download_pdf_incomplete(self, mock_get, pdf_processor, temp_dir):
+        mock_response = MagicMock()
+        mock_response.headers = {'Content-Length': '100'}
+        mock_response.iter_content.return_value = [b'truncated']
+        mock_get.return_value = mock_response
+        
+        assert pdf_processor.download_pdf("http://example.com/test.pdf", temp_dir) is None
+        assert not [f for f in os.listdir(temp_dir) if f.endswith('.pdf') or f.endswith('.part')]
+    
     def test_download_pdf_empty_url(self, pdf_processor, temp_dir):
         result = pdf_processor.download_pdf("", temp_dir)
         assert result is None
@@ -103,6 +156,103 @@ class TestPDFProcessor:
         assert "Page 1 content" in result
         assert "Page 2 content" in result
     
+    @patch('fitz.open')
+    def test_iter_page_texts(self, mock_fitz_open, pdf_processor):
+        pages = [MagicMock(), MagicMock(), MagicMock()]
+        pages[0].get_text.return_value = "Seite  eins\n"
+        pages[1].get_text.return_value = "   \n"
+        pages[2].get_text.return_value = "Seite drei"
+        mock_doc = MagicMock()
+        mock_doc.page_count = 3
+        mock_doc.__getitem__.side_effect = lambda index: pages[index]
+        mock_fitz_open.return_value = mock_doc
+        
+        page_texts = pdf_processor.iter_page_texts("/fake/path.pdf")
+        
+        assert next(page_texts) == "Seite eins"
+        # Pages are read lazily
+        assert pages[2].get_text.call_count == 0
+        assert list(page_texts) == ["Seite drei"]
+        mock_doc.close.assert_called_once()
+    
+    @pytest.mark.slow
+    def test_iter_page_texts_parallel_keeps_page_order(self, temp_dir):
+        import fitz
+        pdf_path = os.path.join(temp_dir, 'paket.pdf')
+        doc = fitz.open()
+        for page_num in range(7):
+            doc.new_page().insert_text((72, 72), f"Seite {page_num + 1}")
+        doc.save(pdf_path)
+        doc.close()
+        
+        sequential = list(PDFProcessor().iter_page_texts(pdf_path))
+        processor = PDFProcessor(page_workers=3, parallel_page_threshold=5)
+        
+        with patch.object(processor, '_iter_pages_fitz_parallel',
+                          wraps=processor._iter_pages_fitz_parallel) as mock_parallel:
+            parallel = list(processor.iter_page_texts(pdf_path))
+        
+        mock_parallel.assert_called_once_with(pdf_path, 7, 3)
+        assert parallel == sequential == [f"Seite {page_num + 1}" for page_num in range(7)]
+    
+    @patch('fitz.open')
+    def test_iter_page_texts_below_threshold_is_sequential(self, mock_fitz_open):
+        mock_doc = MagicMock()
+        mock_doc.page_count = 3
+        mock_doc.__getitem__.return_value.get_text.return_value = "Text"
+        mock_fitz_open.return_value = mock_doc
+        processor = PDFProcessor(page_workers=4, parallel_page_threshold=4)
+        
+        with patch.object(processor, '_iter_pages_fitz_parallel') as mock_parallel:
+            assert list(processor.iter_page_texts("/fake/path.pdf")) == ["Text"] * 3
+        
+        mock_parallel.assert_not_called()
+    
+    @patch('fitz.open')
+    def test_iter_page_texts_busy_cpus_are_sequential(self, mock_fitz_open):
+        mock_doc = MagicMock()
+        mock_doc.page_count = 10
+        mock_doc.__getitem__.return_value.get_text.return_value = "Text"
+        mock_fitz_open.return_value = mock_doc
+        cpu_budget = MagicMock()
+        cpu_budget.reserve.return_value = 0
+        processor = PDFProcessor(page_workers=4, parallel_page_threshold=4, cpu_budget=cpu_budget)
+        
+        # Every CPU is taken by other pool processes
+        with patch.object(processor, '_iter_pages_fitz_parallel') as mock_parallel:
+            assert list(processor.iter_page_texts("/fake/path.pdf")) == ["Text"] * 10
+        
+        mock_parallel.assert_not_called()
+        cpu_budget.reserve.assert_called_once_with(3)
+        cpu_budget.release.assert_called_once_with(0)
+    
+    def test_extract_text_uses_text_cache(self, temp_dir):
+        from pdf_store import TextCache
+        processor = PDFProcessor(text_cache=TextCache(os.path.join(temp_dir, 'text')))
+        pdf_path = os.path.join(temp_dir, 'document.pdf')
+        with open(pdf_path, 'wb') as f:
+            f.write(b'%PDF-1.4 fake')
+        
+        with patch.object(processor, '_extract_text_uncached', return_value='Extrahierter Text') as mock_extract:
+            assert processor.extract_text(pdf_path) == 'Extrahierter Text'
+            assert processor.extract_text(pdf_path) == 'Extrahierter Text'
+        
+        assert mock_extract.call_count == 1
+    
+    def test_extract_text_survives_cache_write_error(self, temp_dir):
+        processor = PDFProcessor(text_cache=MagicMock())
+        processor.text_cache.get.return_value = None
+        processor.text_cache.set.side_effect = OSError("No space left on device")
+        pdf_path = os.path.join(temp_dir, 'document.pdf')
+        with open(pdf_path, 'wb') as f:
+            f.write(b'%PDF-1.4 fake')
+        
+        with patch('pdf_processor.PDF_LIB', 'fitz'), \
+             patch.object(processor, '_extract_text_uncached', return_value='Extrahierter Text'):
+            assert processor.extract_text(pdf_path) == 'Extrahierter Text'
+        
+        processor.text_cache.set.assert_called_once()
+    
     def test_extract_text_nonexistent_file(self, pdf_processor):
         result = pdf_processor.extract_text("/nonexistent/file.pdf")
         assert result == ""
@@ -162,6 +312,93 @@ class TestPDFProcessor:
         
         assert "Automatische Zusammenfassung nicht möglich" in result
     
+    def test_summarize_lengths_ranks_once(self, pdf_processor):
+        ranking = [(2, 'Drei.'), (0, 'Eins.'), (1, 'Zwei.')]
+        long_text = "Dies ist ein sehr langer Text " * 20
+        
+        with patch.object(pdf_processor, 'rank_sentences', return_value=ranking) as mock_rank:
+            result = pdf_processor.summarize_lengths(long_text, [1, 2])
+        
+        assert result == {1: 'Drei.', 2: 'Eins. Drei.'}
+        mock_rank.assert_called_once_with(long_text)
+    
+    @patch('pdf_processor.Tokenizer')
+    @patch('pdf_processor.PlaintextParser')
+    def test_rank_sentences_cached(self, mock_parser, mock_tokenizer, pdf_processor):
+        pdf_processor.summarizer = MagicMock()
+        
+        pdf_processor.rank_sentences("Ein Text")
+        pdf_processor.rank_sentences("Ein Text")
+        pdf_processor.rank_sentences("Ein anderer Text")
+        
+        assert pdf_processor.summarizer.call_count == 2
+    
+    @patch('pdf_processor.PlaintextParser')
+    def test_rank_sentences_chunked(self, mock_parser, pdf_processor):
+        sentences = [f"Satz {i}." for i in range(10)]
+        mock_parser.from_string.return_value.document.sentences = sentences
+        pdf_processor.summary_max_sentences = 4
+        pdf_processor.summary_chunk_sentences = 5
+        
+        calls = []
+        
+        def lsa_order(chunk):
+            calls.append(list(chunk))
+            # Rate later sentences higher
+            return list(reversed(range(len(chunk))))
+        
+        with patch('pdf_processor.Tokenizer'), patch.object(pdf_processor, '_lsa_order', side_effect=lsa_order):
+            ranking = pdf_processor.rank_sentences("Langer Text")
+        
+        # Two chunks of five, then one re-ranking round over the two best of each
+        assert calls[:2] == [sentences[:5], sentences[5:]]
+        assert calls[2] == ["Satz 3.", "Satz 4.", "Satz 8.", "Satz 9."]
+        assert ranking == [(9, "Satz 9."), (8, "Satz 8."), (4, "Satz 4."), (3, "Satz 3.")]
+    
+    @patch('pdf_processor.PlaintextParser')
+    def test_rank_sentences_chunked_caps_winners(self, mock_parser, pdf_processor):
+        sentences = [f"Satz {i}." for i in range(12)]
+        mock_parser.from_string.return_value.document.sentences = sentences
+        pdf_processor.summary_max_sentences = 3
+        pdf_processor.summary_chunk_sentences = 2
+        
+        calls = []
+        
+        def lsa_order(chunk):
+            calls.append(list(chunk))
+            return list(range(len(chunk)))
+        
+        with patch('pdf_processor.Tokenizer'), patch.object(pdf_processor, '_lsa_order', side_effect=lsa_order):
+            ranking = pdf_processor.rank_sentences("Langer Text")
+        
+        # Six chunks give six winners, the re-ranking round keeps three of them
+        assert calls[-1] == ["Satz 0.", "Satz 4.", "Satz 8."]
+        assert [position for position, sentence in ranking] == [0, 4, 8]
+    
+    @patch('pdf_processor.PlaintextParser')
+    def test_rank_sentences_chunked_time_budget_covers_document(self, mock_parser, pdf_processor):
+        sentences = [f"Satz {i}." for i in range(8)]
+        mock_parser.from_string.return_value.document.sentences = sentences
+        pdf_processor.summary_max_sentences = 4
+        pdf_processor.summary_chunk_sentences = 2
+        pdf_processor.summary_time_budget = 10
+        
+        calls = []
+        
+        def lsa_order(chunk):
+            calls.append(list(chunk))
+            return list(range(len(chunk)))
+        
+        # Deadline at 10; the budget runs out after two of four chunks
+        clock = itertools.chain([0, 0, 0], itertools.repeat(100))
+        with patch('pdf_processor.Tokenizer'), patch.object(pdf_processor, '_lsa_order', side_effect=lsa_order), \
+             patch('pdf_processor.time.monotonic', side_effect=lambda: next(clock)):
+            ranking = pdf_processor.rank_sentences("Langer Text")
+        
+        # The first and the last part of the document, not the first two chunks
+        assert calls[:2] == [sentences[0:2], sentences[4:6]]
+        assert sorted(position for position, sentence in ranking) == [0, 4]
+    
     def test_get_german_stopwords(self, pdf_processor):
         stopwords = pdf_processor._get_german_stopwords()
         
@@ -0,0 +1,87 @@
+import pytest
+import os
+import tempfile
+import shutil
+from unittest.mock import patch, MagicMock
+from pdf_store import PDFStore, TextCache
+
+
+class TestPDFStore:
+    
+    @pytest.fixture
+    def temp_dir(self):
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir)
+    
+    def test_save_and_lookup(self, temp_dir):
+        store = PDFStore(temp_dir)
+        
+        path = store.save("http://example.com/a.pdf", [b'%PDF', b'-1.4'], etag='"v1"')
+        entry = store.lookup("http://example.com/a.pdf")
+        
+        assert os.path.basename(path) == entry['sha256'] + '.pdf'
+        assert entry['etag'] == '"v1"'
+        assert entry['size'] == 8
+    
+    def test_index_persisted(self, temp_dir):
+        PDFStore(temp_dir).save("http://example.com/a.pdf", [b'content'])
+        
+        assert PDFStore(temp_dir).lookup("http://example.com/a.pdf") is not None
+    
+    def test_damaged_file_is_forgotten(self, temp_dir):
+        store = PDFStore(temp_dir)
+        path = store.save("http://example.com/a.pdf", [b'content'])
+        with open(path, 'ab') as f:
+            f.write(b'garbage')
+        
+        assert store.lookup("http://example.com/a.pdf") is None
+    
+    def test_lru_eviction(self, temp_dir):
+        store = PDFStore(temp_dir, max_bytes=25)
+        
+        first = store.save("http://example.com/1.pdf", [b'1' * 10])
+        store.save("http://example.com/2.pdf", [b'2' * 10])
+        store.touch("http://example.com/1.pdf")
+        store.save("http://example.com/3.pdf", [b'3' * 10])
+        
+        assert store.total_size() <= 25
+        assert os.path.exists(first)
+        assert store.lookup("http://example.com/2.pdf") is None
+        assert store.lookup("http://example.com/3.pdf") is not None
+    
+    def test_text_cache_roundtrip(self, temp_dir):
+        cache = TextCache(temp_dir)
+        
+        assert cache.get('abc', 'fitz', '1.23+1') is None
+        cache.set('abc', 'fitz', '1.23+1', 'Tagesordnung der Sitzung')
+        
+        assert cache.get('abc', 'fitz', '1.23+1') == 'Tagesordnung der Sitzung'
+        assert cache.get('abc', 'fitz', '1.24+1') is None
+        assert cache.get('abc', 'pdfplumber', '1.23+1') is None
+    
+    def test_text_cache_eviction(self, temp_dir):
+        cache = TextCache(temp_dir, max_bytes=1)
+        
+        cache.set('first', 'fitz', '1', 'a' * 1000)
+        cache.set('second', 'fitz', '1', 'b' * 1000)
+        
+        assert cache.get('first', 'fitz', '1') is None
+        assert cache.get('second', 'fitz', '1') == 'b' * 1000
+    
+    def test_text_cache_skips_vanished_entries(self, temp_dir):
+        cache = TextCache(temp_dir, max_bytes=1)
+        cache.set('first', 'fitz', '1', 'a' * 1000)
+        
+        # Evicted by another process between scandir() and stat()
+        vanished = MagicMock(path=os.path.join(temp_dir, 'gone-fitz-1.txt.gz'))
+        vanished.name = 'gone-fitz-1.txt.gz'
+        vanished.stat.side_effect = FileNotFoundError()
+        real_scandir = os.scandir
+        
+        with patch('pdf_store.os.scandir', side_effect=lambda folder: list(real_scandir(folder)) + [vanished]):
+            cache.set('second', 'fitz', '1', 'b' * 1000)
+            assert cache.total_size() > 0
+        
+        assert cache.get('first', 'fitz', '1') is None
+        assert cache.get('second', 'fitz', '1') == 'b' * 1000
@@ -0,0 +1,166 @@
+import pytest
+import os
+import tempfile
+import shutil
+import multiprocessing
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import MagicMock
+from pipeline import MeetingPipeline, CPUBudget, create_process_pool
+
+
+class TestMeetingPipeline:
+    
+    @pytest.fixture
+    def temp_dir(self):
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir)
+    
+    @pytest.fixture
+    def meetings(self):
+        return [
+            {'title': 'Rat der Stadt Lünen', 'pdf_url': 'http://example.com/1.pdf'},
+            {'title': 'Ohne PDF', 'pdf_url': None},
+            {'title': 'Rechnungsprüfungsausschuss', 'pdf_url': 'http://example.com/3.pdf'}
+        ]
+    
+    def test_run_in_thread(self, meetings, temp_dir):
+        processor = MagicMock()
+        processor.download_pdf.side_effect = lambda url, folder: url.replace('http://example.com', folder)
+        processor.extract_text.side_effect = lambda path: f"Text aus {os.path.basename(path)}"
+        processor.summarize_lengths.side_effect = lambda text, counts: {c: f"{c}: {text}" for c in counts}
+        processor.ranked_sentences.return_value = []
+        
+        results = MeetingPipeline(processor, temp_dir, io_workers=2).run(meetings)
+        
+        assert results[0]['summary'] == '2: Text aus 1.pdf'
+        assert results[0]['detailed_summary'] == '5: Text aus 1.pdf'
+        assert results[1] is None
+        assert results[2]['full_text'] == 'Text aus 3.pdf'
+    
+    def test_failure_is_isolated(self, meetings, temp_dir):
+        processor = MagicMock()
+        processor.download_pdf.side_effect = [Exception("Download error"), '/fake/3.pdf']
+        processor.extract_text.return_value = 'Text'
+        processor.summarize_lengths.return_value = {2: 'Summary', 5: 'Summary'}
+        processor.ranked_sentences.return_value = []
+        
+        results = MeetingPipeline(processor, temp_dir, io_workers=1).run(meetings)
+        
+        assert results[0] == {'error': 'Download error'}
+        assert results[2]['summary'] == 'Summary'
+    
+    def test_failed_download_is_an_error(self, meetings, temp_dir):
+        processor = MagicMock()
+        # download_pdf reports problems by returning None
+        processor.download_pdf.return_value = None
+        
+        results = MeetingPipeline(processor, temp_dir, io_workers=1).run(meetings)
+        
+        assert 'error' in results[0]
+        assert 'error' in results[2]
+        processor.extract_text.assert_not_called()
+    
+    def test_broken_pool_is_replaced(self, temp_dir):
+        processor = MagicMock()
+        processor.download_pdf.return_value = '/fake/path.pdf'
+        broken = MagicMock()
+        broken.submit.side_effect = BrokenProcessPool("Worker abgestürzt")
+        
+        def submit(func, pdf_path):
+            future = Future()
+            future.set_result({'summary': 'Summary'})
+            return future
+        
+        replacement = MagicMock()
+        replacement.submit.side_effect = submit
+        on_broken_pool = MagicMock(return_value=replacement)
+        meetings = [{'pdf_url': f'http://example.com/{i}.pdf'} for i in range(2)]
+        
+        results = MeetingPipeline(processor, temp_dir, io_workers=1, process_executor=broken,
+                                  on_broken_pool=on_broken_pool).run(meetings)
+        
+        assert 'error' in results[0]
+        assert results[1] == {'summary': 'Summary'}
+        on_broken_pool.assert_called_once_with(broken)
+    
+    def test_failed_pool_replacement_does_not_hang(self, temp_dir):
+        processor = MagicMock()
+        processor.download_pdf.return_value = '/fake/path.pdf'
+        processor.extract_text.return_value = 'Text'
+        processor.summarize_lengths.return_value = {2: 'Summary', 5: 'Summary'}
+        processor.ranked_sentences.return_value = []
+        
+        def submit(func, pdf_path):
+            future = Future()
+            future.set_exception(BrokenProcessPool("Worker abgestürzt"))
+            return future
+        
+        broken = MagicMock()
+        broken.submit.side_effect = submit
+        on_broken_pool = MagicMock(side_effect=OSError("Keine Prozesse verfügbar"))
+        meetings = [{'pdf_url': f'http://example.com/{i}.pdf'} for i in range(2)]
+        
+        results = MeetingPipeline(processor, temp_dir, io_workers=1, process_executor=broken,
+                                  on_broken_pool=on_broken_pool).run(meetings)
+        
+        # The first meeting fails, the second runs in the download thread
+        assert 'error' in results[0]
+        assert results[1]['summary'] == 'Summary'
+    
+    def test_lost_result_does_not_hang(self, temp_dir):
+        processor = MagicMock()
+        processor.download_pdf.return_value = '/fake/path.pdf'
+        # A finished future whose done callback never runs
+        lost = MagicMock()
+        lost.done.return_value = True
+        executor = MagicMock()
+        executor.submit.return_value = lost
+        
+        pipeline = MeetingPipeline(processor, temp_dir, io_workers=1, process_executor=executor)
+        pipeline.poll_interval = 0.01
+        results = pipeline.run([{'pdf_url': 'http://example.com/1.pdf'}])
+        
+        assert 'error' in results[0]
+    
+    def test_closing_iterator_skips_remaining_meetings(self, temp_dir):
+        processor = MagicMock()
+        processor.download_pdf.return_value = '/fake/path.pdf'
+        processor.extract_text.return_value = 'Text'
+        processor.summarize_lengths.return_value = {2: 'Summary', 5: 'Summary'}
+        processor.ranked_sentences.return_value = []
+        meetings = [{'pdf_url': f'http://example.com/{i}.pdf'} for i in range(10)]
+        
+        results = MeetingPipeline(processor, temp_dir, io_workers=1).iter_results(meetings)
+        next(results)
+        results.close()
+        
+        assert processor.download_pdf.call_count < len(meetings)
+    
+    def test_cpu_budget_grants_idle_cpus(self):
+        budget = CPUBudget(multiprocessing.Value('i', 0), cpu_count=4)
+        
+        # One busy pool process: a large PDF may use the three idle CPUs
+        budget.claim()
+        assert budget.reserve(5) == 3
+        assert budget.reserve(1) == 0
+        
+        budget.release(3)
+        budget.claim(2)
+        assert budget.reserve(3) == 1
+    
+    @pytest.mark.slow
+    def test_run_with_process_pool(self, meetings, temp_dir):
+        processor = MagicMock()
+        processor.download_pdf.return_value = os.path.join(temp_dir, 'missing.pdf')
+        
+        pool = create_process_pool(1)
+        try:
+            results = MeetingPipeline(processor, temp_dir, process_executor=pool, max_pending=1).run(meetings)
+        finally:
+            pool.shutdown()
+        
+        # Missing file: the worker's own PDFProcessor reports too little text
+        assert "Zu wenig Text" in results[0]['summary']
+        assert "Zu wenig Text" in results[2]['summary']
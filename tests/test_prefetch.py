@@ -0,0 +1,53 @@
+import pytest
+import threading
+import time
+from prefetch import PrefetchScheduler
+
+
+class TestPrefetchScheduler:
+    
+    def test_run_once(self):
+        calls = []
+        scheduler = PrefetchScheduler(lambda job: calls.append(job.kind))
+        
+        assert scheduler.run_once() == 'done'
+        assert calls == ['prefetch']
+    
+    def test_stops_when_app_becomes_busy(self):
+        busy = threading.Event()
+        checked = []
+        
+        def prefetch(job):
+            for meeting in range(5):
+                job.check_cancelled()
+                checked.append(meeting)
+                if meeting == 1:
+                    # A user request arrives
+                    busy.set()
+        
+        scheduler = PrefetchScheduler(prefetch, is_idle=lambda: not busy.is_set())
+        
+        assert scheduler.run_once() == 'cancelled'
+        assert checked == [0, 1]
+    
+    def test_failure(self):
+        def prefetch(job):
+            raise Exception("Netzwerkfehler")
+        
+        assert PrefetchScheduler(prefetch).run_once() == 'failed'
+    
+    def test_background_loop_waits_for_idle(self):
+        idle = threading.Event()
+        ran = threading.Event()
+        scheduler = PrefetchScheduler(lambda job: ran.set(), interval=60,
+                                      is_idle=idle.is_set, idle_poll=0.01)
+        
+        scheduler.start()
+        try:
+            time.sleep(0.05)
+            assert not ran.is_set()
+            
+            idle.set()
+            assert ran.wait(5)
+        finally:
+            scheduler.stop()
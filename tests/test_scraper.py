@@ -1,10 +1,14 @@
 import pytest
 import os
+import re
+import shutil
+import tempfile
 from datetime import datetime
 from unittest.mock import patch, MagicMock
 import responses
 from bs4 import BeautifulSoup
-from scraper import RatsInfoScraper
+from http_cache import HTTPCache
+from scraper import RatsInfoScraper, ScrapeError, meeting_id
 
 
 class TestRatsInfoScraper:
@@ -195,8 +199,9 @@ class TestRatsInfoScraper:
             status=500
         )
         
+        # Nothing could be fetched, which is not the same as an empty month
         meetings = scraper._scrape_month(2024, 3)
-        assert meetings == []
+        assert meetings is None
     
     @patch.object(RatsInfoScraper, '_scrape_month')
     @patch.object(RatsInfoScraper, '_get_pdf_url')
@@ -223,8 +228,9 @@ class TestRatsInfoScraper:
         assert meetings[0]['committee'] == 'Rat der Stadt Lünen'
         assert meetings[0]['pdf_url'] == 'http://example.com/test.pdf'
     
+    @patch.object(RatsInfoScraper, '_scrape_range_json', return_value=None)
     @patch.object(RatsInfoScraper, '_scrape_month')
-    def test_scrape_meetings_multiple_months(self, mock_scrape_month, scraper):
+    def test_scrape_meetings_multiple_months(self, mock_scrape_month, mock_range, scraper):
         mock_scrape_month.return_value = []
         
         start_date = datetime(2024, 2, 15)
@@ -307,4 +313,242 @@ class TestRatsInfoScraper:
         
         # Should only return the meeting in the date range
         assert len(meetings) == 1
-        assert meetings[0]['date'] == '15.03.2024'
\ No newline at end of file
+        assert meetings[0]['date'] == '15.03.2024'
+    
+    def test_meeting_id_from_detail_url(self):
+        assert meeting_id({'detail_url': 'https://luenen.ratsinfomanagement.net/tops/?__=LfyIfvG8Ww4'}) == 'sitzung-LfyIfvG8Ww4'
+        assert meeting_id({'detail_url': 'https://example.com/si0057.php?__ksinr=987'}) == 'sitzung-987'
+    
+    def test_meeting_id_token_safe_for_urls(self):
+        token_id = meeting_id({'detail_url': 'https://luenen.ratsinfomanagement.net/tops/?__=a/b%2Bc'})
+        
+        assert token_id.startswith('sitzung-')
+        assert re.fullmatch(r'[\w-]+', token_id)
+    
+    def test_meeting_id_ignores_numbers_in_path(self):
+        meeting = {'date': '15.03.2024', 'time': '18:00', 'committee': 'Rat der Stadt Lünen'}
+        
+        # Path numbers are no session ids (e.g. /termine/2024/03/), so the meeting is hashed
+        assert meeting_id(dict(meeting, detail_url='https://luenen.ratsinfomanagement.net/termine/2024/03/')) == \
+            meeting_id(dict(meeting, detail_url=''))
+    
+    def test_meeting_id_without_upstream_id(self):
+        meeting = {'detail_url': '', 'date': '15.03.2024', 'time': '18:00', 'committee': 'Rat der Stadt Lünen'}
+        
+        assert meeting_id(meeting) == meeting_id(dict(meeting, title='Anderer Titel'))
+        assert meeting_id(meeting) != meeting_id(dict(meeting, time='19:00'))
+        assert meeting_id(meeting).startswith('termin-')
+    
+    def test_month_range_across_year(self, scraper):
+        months = scraper._month_range(datetime(2024, 11, 30), datetime(2025, 2, 1))
+        
+        assert months == [(2024, 11), (2024, 12), (2025, 1), (2025, 2)]
+    
+    @patch.object(RatsInfoScraper, '_scrape_range_json', return_value=None)
+    @patch.object(RatsInfoScraper, '_scrape_month')
+    @patch.object(RatsInfoScraper, '_get_pdf_url')
+    def test_scrape_meetings_concurrent_order(self, mock_get_pdf, mock_scrape_month, mock_range, scraper):
+        def fake_month(year, month, cache=True):
+            return [{
+                'date': f'10.{month:02d}.{year}',
+                'time': '18:00',
+                'committee': 'Rat der Stadt Lünen',
+                'title': 'Rat der Stadt Lünen',
+                'location': 'Rathaus',
+                'detail_url': ''
+            }]
+        mock_scrape_month.side_effect = fake_month
+        mock_get_pdf.return_value = None
+        scraper.max_workers = 4
+        
+        meetings = scraper.scrape_meetings(datetime(2024, 1, 1), datetime(2024, 12, 31))
+        
+        assert mock_scrape_month.call_count == 12
+        assert [m['date'] for m in meetings] == [f'10.{month:02d}.2024' for month in range(1, 13)]
+    
+    @patch.object(RatsInfoScraper, '_scrape_range_json')
+    @patch.object(RatsInfoScraper, '_scrape_month', return_value=[])
+    def test_scrape_meetings_reports_month_progress(self, mock_scrape_month, mock_range, scraper):
+        # First block of two months fails and falls back to single months
+        mock_range.side_effect = lambda months, cache=True: None if months[0] == (2024, 1) else []
+        scraper.range_chunk_months = 2
+        scraper.max_workers = 1
+        reports = []
+        
+        scraper.scrape_meetings(datetime(2024, 1, 1), datetime(2024, 4, 30),
+                                progress=lambda done, total: reports.append((done, total)))
+        
+        assert reports == [(2, 4), (3, 4), (4, 4)]
+    
+    @patch.object(RatsInfoScraper, '_scrape_range_json', return_value=None)
+    @patch.object(RatsInfoScraper, '_scrape_month')
+    def test_scrape_meetings_failed_month(self, mock_scrape_month, mock_range, scraper):
+        mock_scrape_month.side_effect = lambda year, month, cache=True: None if month == 2 else []
+        scraper.max_workers = 1
+        
+        assert scraper.scrape_meetings(datetime(2024, 1, 1), datetime(2024, 3, 31)) == []
+        with pytest.raises(ScrapeError):
+            scraper.scrape_meetings(datetime(2024, 1, 1), datetime(2024, 3, 31), raise_on_error=True)
+    
+    @patch.object(RatsInfoScraper, '_scrape_month')
+    @patch.object(RatsInfoScraper, '_fetch_json_meetings')
+    def test_scrape_meetings_single_ranged_request(self, mock_fetch, mock_scrape_month, scraper):
+        mock_fetch.return_value = [
+            {
+                'date': '15.03.2024',
+                'time': '18:00',
+                'committee': 'Rat der Stadt Lünen',
+                'title': 'Rat der Stadt Lünen',
+                'location': 'Rathaus',
+                'detail_url': ''
+            }
+        ]
+        
+        meetings = scraper.scrape_meetings(datetime(2024, 1, 15), datetime(2024, 6, 15))
+        
+        mock_fetch.assert_called_once_with(datetime(2024, 1, 1), datetime(2024, 6, 30), cache=True)
+        mock_scrape_month.assert_not_called()
+        assert len(meetings) == 1
+    
+    @patch.object(RatsInfoScraper, '_scrape_month')
+    @patch.object(RatsInfoScraper, '_scrape_range_json')
+    def test_scrape_meetings_range_chunks_fallback(self, mock_range, mock_scrape_month, scraper):
+        # First block succeeds, second block fails and is scraped per month
+        mock_range.side_effect = lambda months, cache=True: (
+            None if months[0] == (2024, 4) else
+            [{'date': '10.01.2024', 'time': '', 'committee': 'Rat der Stadt Lünen',
+              'title': 'Rat der Stadt Lünen', 'location': '', 'detail_url': ''}]
+        )
+        mock_scrape_month.return_value = []
+        scraper.range_chunk_months = 3
+        
+        scraper.scrape_meetings(datetime(2024, 1, 1), datetime(2024, 6, 30))
+        
+        assert mock_range.call_count == 2
+        called_months = sorted(call.args for call in mock_scrape_month.call_args_list)
+        assert called_months == [(2024, 4), (2024, 5), (2024, 6)]
+    
+    @responses.activate
+    def test_csrf_token_cached(self, scraper):
+        responses.add(
+            responses.GET,
+            scraper.termine_url,
+            body='<html><head><meta name="csrf-token" content="abc123"></head></html>',
+            status=200
+        )
+        
+        assert scraper._get_csrf_token() == "abc123"
+        assert scraper._get_csrf_token() == "abc123"
+        assert len(responses.calls) == 1
+    
+    @responses.activate
+    def test_json_request_retries_with_fresh_token(self, scraper):
+        json_url = "https://luenen.ratsinfomanagement.net/termine/json/Sitzungstermine/"
+        responses.add(responses.GET, scraper.termine_url,
+                      body='<meta name="csrf-token" content="old">', status=200)
+        responses.add(responses.GET, scraper.termine_url,
+                      body='<meta name="csrf-token" content="new">', status=200)
+        responses.add(responses.POST, json_url, status=419)
+        responses.add(responses.POST, json_url, status=200,
+                      json=[{'title': 'Rat der Stadt Lünen', 'start': '2024-03-15T18:00:00'}])
+        
+        meetings = scraper._fetch_json_meetings(datetime(2024, 3, 1), datetime(2024, 3, 31))
+        
+        assert len(meetings) == 1
+        post_calls = [c for c in responses.calls if c.request.method == 'POST']
+        assert post_calls[0].request.headers['X-CSRF-Token'] == 'old'
+        assert post_calls[1].request.headers['X-CSRF-Token'] == 'new'
+    
+    @responses.activate
+    def test_uncached_listing_bypasses_http_cache(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            scraper = RatsInfoScraper(http_cache=HTTPCache(os.path.join(temp_dir, 'http_cache.sqlite3')))
+            scraper._get_csrf_token = lambda force_refresh=False: None
+            json_url = "https://luenen.ratsinfomanagement.net/termine/json/Sitzungstermine/"
+            responses.add(responses.POST, json_url, status=200,
+                          json=[{'title': 'Rat der Stadt Lünen', 'start': '2024-03-15T18:00:00'}])
+            responses.add(responses.POST, json_url, status=200,
+                          json=[{'title': 'Rat der Stadt Lünen', 'start': '2024-03-15T18:00:00'},
+                                {'title': 'Rechnungsprüfungsausschuss', 'start': '2024-03-20T17:00:00'}])
+            start_date, end_date = datetime(2024, 3, 1), datetime(2024, 3, 31)
+            
+            assert len(scraper._fetch_json_meetings(start_date, end_date)) == 1
+            assert len(scraper._fetch_json_meetings(start_date, end_date)) == 1
+            assert len(scraper._fetch_json_meetings(start_date, end_date, cache=False)) == 2
+            assert len(responses.calls) == 2
+        finally:
+            shutil.rmtree(temp_dir)
+    
+    @patch.object(RatsInfoScraper, '_get_pdf_url')
+    def test_resolve_pdf_urls_keeps_order(self, mock_get_pdf, scraper):
+        mock_get_pdf.side_effect = lambda url, cache_ttl=None: url.replace('/detail/', '/pdf/') + '.pdf'
+        meetings = [{'date': '15.03.2024', 'detail_url': f'http://example.com/detail/{i}'} for i in range(10)]
+        meetings.append({'date': '15.03.2024', 'detail_url': ''})
+        
+        scraper.resolve_pdf_urls(meetings)
+        
+        assert [m['pdf_url'] for m in meetings[:10]] == [f'http://example.com/pdf/{i}.pdf' for i in range(10)]
+        assert meetings[10]['pdf_url'] is None
+        assert mock_get_pdf.call_count == 10
+    
+    def test_host_limiter_caps_concurrency(self):
+        import threading
+        import time
+        from scraper import HostLimiter
+        
+        limiter = HostLimiter(max_per_host=2)
+        active = []
+        peak = []
+        lock = threading.Lock()
+        
+        def work():
+            with limiter.slot('http://example.com/detail/1'):
+                with lock:
+                    active.append(1)
+                    peak.append(len(active))
+                time.sleep(0.02)
+                with lock:
+                    active.pop()
+        
+        threads = [threading.Thread(target=work) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert max(peak) <= 2
+    
+    @patch.object(RatsInfoScraper, '_scrape_month')
+    @patch.object(RatsInfoScraper, '_get_pdf_url')
+    def test_scrape_meetings_committee_selection(self, mock_get_pdf, mock_scrape_month, scraper):
+        mock_scrape_month.return_value = [
+            {
+                'date': '15.03.2024',
+                'time': '18:00',
+                'committee': 'Rat der Stadt Lünen',
+                'title': 'Rat der Stadt Lünen',
+                'location': 'Rathaus',
+                'detail_url': 'http://example.com/detail/1'
+            },
+            {
+                'date': '20.03.2024',
+                'time': '19:00',
+                'committee': 'Sportausschuss',
+                'title': 'Sportausschuss',
+                'location': 'Anderswo',
+                'detail_url': 'http://example.com/detail/2'
+            }
+        ]
+        mock_get_pdf.return_value = None
+        
+        meetings = scraper.scrape_meetings(datetime(2024, 3, 1), datetime(2024, 3, 31),
+                                           committees=['Sportausschuss'])
+        
+        assert [m['committee'] for m in meetings] == ['Sportausschuss']
+        mock_get_pdf.assert_called_once_with('http://example.com/detail/2', cache_ttl=scraper.cache_ttl_past)
+        
+        meetings = scraper.scrape_meetings(datetime(2024, 3, 1), datetime(2024, 3, 31),
+                                           committees=scraper._is_relevant_committee)
+        
+        assert [m['committee'] for m in meetings] == ['Rat der Stadt Lünen']